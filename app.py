@@ -1,294 +1,81 @@
 
 
-from groq import Groq
-import gradio as gr
+import asyncio
 import json
-import random
-from datetime import datetime
+import logging
 from typing import List, Dict
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from completion_cache import COMPLETION_CACHE
+from completion_stream import (
+    ReplyAssembler, aclose_stream, assistant_message, close_stream, reply_from_response
+)
+from exam_context import estimate_history_tokens, estimate_messages_tokens
+from exam_core import (
+    CURRENT_EXAMS, TOOLS, abandon_exam, execute_function, get_exam_progress, get_statistics,
+    next_topic, normalize_email, restore_state
+)
+from exam_intro import parse_introduction
+from exam_record import ExamRecord
+from exam_sessions import SESSIONS
+from exam_storage import STORAGE
+from exam_transcript import Transcript
+from groq_pool import CLIENT_POOL, client_lease
+from groq_scheduler import FOLLOW_UP, FRESH_TURN, PREFETCH, SCHEDULER
+from instrumentation import METRICS, get_logger
+from model_router import MODEL_ROUTER
+from prompt_bundles import (
+    ALL_TOPICS_DONE, GRADING_CONTEXT, IN_TOPIC, SERVER_PHASE_TOOLS, PhaseBundle, build_phase_bundles, phase_of,
+    progress_context, topic_state_context, transition_context
+)
+from question_bank import BANK_QUESTIONS, QUESTION_BANK
+from reply_budget import REPLY_BUDGET
+from results_export import ADMIN_TOKEN, PAGE_LIMIT, ResultFilter, check_admin_token, export_stream, results_page
+from state_backend import STATE
+from topic_prefetch import PREFETCH_AFTER, PREFETCHER
+from turn_recorder import RECORDER
+
+
+CHAT_CONCURRENCY_LIMIT = int(os.getenv("EXAM_CONCURRENCY_LIMIT", "200"))
+TOOL_WORKERS = int(os.getenv("EXAM_TOOL_WORKERS", "8"))
+TOPIC_CONTROL = os.getenv("EXAM_TOPIC_CONTROL", "server")
+QUESTIONS_PER_TOPIC = int(os.getenv("EXAM_QUESTIONS_PER_TOPIC", "3"))
+EXAM_STATE_TOOLS = {"start_exam", "next_topic", "end_exam"}
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="exam-tools")
+STATE_WORKERS = int(os.getenv("EXAM_STATE_WORKERS", "32"))
+STATE_EXECUTOR = ThreadPoolExecutor(max_workers=STATE_WORKERS, thread_name_prefix="exam-state")
+
+log = get_logger("app")
+
+TURN_SECONDS = METRICS.histogram("exam_turn_seconds", "Повна тривалість ходу чату")
+TURN_PHASE_SECONDS = METRICS.histogram("exam_turn_phase_seconds", "Тривалість етапів ходу чату")
+FIRST_TOKEN_SECONDS = METRICS.histogram("groq_first_token_seconds", "Час до першого токена відповіді")
+GROQ_TOKENS = METRICS.counter("groq_tokens_total", "Токени промпту та відповіді Groq")
+PROMPT_PREFIX_TOKENS = METRICS.counter("prompt_prefix_tokens_total", "Токени промпту, що збігаються з попереднім запитом сесії")
+INTRO_PARSES = METRICS.counter("exam_intro_parsed_total", "Локальне розпізнавання імені та email студента")
+TOOL_ITERATION_SECONDS = METRICS.histogram("exam_tool_iteration_seconds", "Тривалість виконання інструментів за ітерацію")
+TOOL_ITERATIONS = METRICS.histogram("exam_tool_iterations", "Ітерації tool-call циклу за хід", (0, 1, 2, 3))
+EXAM_COMPLETIONS = METRICS.histogram(
+    "exam_completions", "Запити до LLM на завершений іспит", (4, 6, 8, 10, 12, 14, 16, 20, 25, 30)
+)
+METRICS.gauge("exam_sessions", "Активні сесії Gradio", source=lambda: len(SESSIONS))
+METRICS.gauge("exam_transcript_bytes", "Памʼять стиснених транскриптів сесій", source=SESSIONS.transcript_bytes)
+METRICS.add_collector("groq_pool", CLIENT_POOL.stats)
+METRICS.add_collector("completion_cache", COMPLETION_CACHE.stats)
+METRICS.add_collector("reply_budget", REPLY_BUDGET.stats)
+METRICS.add_collector("topic_prefetch", PREFETCHER.stats)
+
+
+GRADING_RUBRIC = """ОЦІНЮВАННЯ:
+9-10: Глибоке розуміння, деталі, приклади
+7-8: Хороше розуміння основ
+5-6: Базове розуміння
+3-4: Слабке розуміння
+0-2: Не знає"""
 
-
-STUDENTS_DB = {
-    "test@lpnu.ua": {"name": "Тестовий Студент", "active": True},
-}
-
-NLP_TOPICS = [
-    "Tokenization та Word Embeddings",
-    "Transformer Architecture та Self-Attention",
-    "BERT та Masked Language Modeling",
-    "GPT моделі та Autoregressive Generation",
-    "Fine-tuning та Transfer Learning",
-    "Named Entity Recognition (NER)",
-    "Machine Translation та Seq2Seq",
-    "Text Classification та Sentiment Analysis",
-    "Question Answering Systems",
-    "Prompt Engineering та Few-Shot Learning",
-]
-
-EXAM_RESULTS = []
-CURRENT_EXAMS = {}
-
-
-def start_exam(email: str, name: str) -> dict:
-    if email in CURRENT_EXAMS:
-        return {
-            "success": False,
-            "message": f"Іспит уже розпочато для {name}. Завершіть попередній іспит перед стартом нового."
-        }
-
-    if email not in STUDENTS_DB:
-        STUDENTS_DB[email] = {
-            "name": name,
-            "active": True
-        }
-
-    student_info = STUDENTS_DB[email]
-    if not student_info["active"]:
-        return {"success": False, "message": "Ваш акаунт неактивний"}
-
-    num_topics = random.randint(2, 3)
-    selected_topics = random.sample(NLP_TOPICS, num_topics)
-
-    CURRENT_EXAMS[email] = {
-        "name": name,
-        "email": email,
-        "start_time": datetime.now().isoformat(),
-        "topics": selected_topics,
-        "current_topic_index": 0,
-        "questions_on_topic": 0,
-        "answers": []
-    }
-
-    print(f"Іспит розпочато для {name}")
-    print(f"Теми: {', '.join(selected_topics)}")
-
-    return {
-        "success": True,
-        "topics": selected_topics,
-        "student_name": name,
-        "message": f"Іспит успішно розпочато для {name}!\n\nВаші теми:\n" +
-                   "\n".join([f"{i + 1}. {t}" for i, t in enumerate(selected_topics)])
-    }
-
-
-def next_topic(email: str) -> dict:
-    print(f"next_topic викликано для {email}")
-
-    if email not in CURRENT_EXAMS:
-        return {
-            "success": False,
-            "message": "Не знайдено активного іспиту"
-        }
-
-    exam = CURRENT_EXAMS[email]
-    exam["current_topic_index"] += 1
-    exam["questions_on_topic"] = 0
-
-    new_index = exam["current_topic_index"]
-    topics = exam["topics"]
-
-    print(f"Перейшли на тему {new_index + 1}/{len(topics)}")
-
-    if new_index >= len(topics):
-        return {
-            "success": True,
-            "finished": True,
-            "message": "Всі теми пройдено! Час завершувати іспит."
-        }
-
-    return {
-        "success": True,
-        "finished": False,
-        "current_topic": topics[new_index],
-        "topic_number": new_index + 1,
-        "total_topics": len(topics),
-        "message": f"Переходимо до теми {new_index + 1}/{len(topics)}: {topics[new_index]}"
-    }
-
-
-def end_exam(email: str, score: float, feedback: str) -> dict:
-    print(f"end_exam викликано: {email}, оцінка={score}")
-
-    if email not in CURRENT_EXAMS:
-        return {
-            "success": False,
-            "message": "Не знайдено активного іспиту для цього email"
-        }
-
-    exam_info = CURRENT_EXAMS[email]
-    end_time = datetime.now()
-    start_time = datetime.fromisoformat(exam_info["start_time"])
-    duration = (end_time - start_time).total_seconds() / 60
-
-    result = {
-        "email": email,
-        "name": exam_info["name"],
-        "score": round(score, 1),
-        "start_time": exam_info["start_time"],
-        "end_time": end_time.isoformat(),
-        "duration_minutes": round(duration, 2),
-        "topics": exam_info["topics"],
-        "feedback": feedback,
-        "answers_count": len(exam_info.get("answers", []))
-    }
-
-    EXAM_RESULTS.append(result)
-    del CURRENT_EXAMS[email]
-
-    if score >= 9:
-        grade = "Відмінно!"
-    elif score >= 7:
-        grade = "Добре!"
-    elif score >= 5:
-        grade = "Задовільно"
-    else:
-        grade = "Потрібно вчити"
-
-    print(f"Іспит завершено! Оцінка: {score}/10, Grade: {grade}")
-
-    return {
-        "success": True,
-        "score": score,
-        "grade": grade,
-        "duration": duration,
-        "message": f"{grade}\n\nВаша оцінка: {score}/10\nТривалість: {duration:.1f} хв"
-    }
-
-
-def get_statistics() -> str:
-    try:
-        if not EXAM_RESULTS:
-            return "Ще немає завершених іспитів"
-
-        scores = [r["score"] for r in EXAM_RESULTS]
-
-        avg_score = sum(scores) / len(scores)
-        max_score = max(scores)
-        min_score = min(scores)
-        total_exams = len(EXAM_RESULTS)
-        total_time = sum(r["duration_minutes"] for r in EXAM_RESULTS)
-
-        stats = f"СТАТИСТИКА ІСПИТІВ\n"
-        stats += "=" * 50 + "\n\n"
-        stats += f"ЗАГАЛЬНІ ПОКАЗНИКИ:\n"
-        stats += f"Всього проведено іспитів: {total_exams}\n"
-        stats += f"Середня оцінка: {avg_score:.2f}/10\n"
-        stats += f"Найвища оцінка: {max_score}/10\n"
-        stats += f"Найнижча оцінка: {min_score}/10\n"
-        stats += f"Загальний час: {total_time:.1f} хвилин\n\n"
-        stats += "=" * 50 + "\n\n"
-        stats += "ОСТАННІ 5 СТУДЕНТІВ:\n\n"
-
-        for i, r in enumerate(EXAM_RESULTS[-5:], 1):
-            stats += f"{i}. {r['name']}\n"
-            stats += f"   Оцінка: {r['score']}/10\n"
-            stats += f"   Час: {r['duration_minutes']:.1f} хв\n"
-            topic_list = ", ".join(r['topics'][:2])
-            if len(r['topics']) > 2:
-                topic_list += ", ..."
-            stats += f"   Теми: {topic_list}\n\n"
-
-        return stats
-
-    except Exception as e:
-        return f"Помилка при обчисленні статистики: {str(e)}"
-
-
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "start_exam",
-            "description": "Розпочати іспит ТІЛЬКИ коли студент чітко надав ІМ'Я та EMAIL. Викликай ОДИН РАЗ!",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "Email студента: name@lpnu.ua (наприклад test@lpnu.ua)"
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "Повне ім'я студента (наприклад 'Іван Петренко')"
-                    }
-                },
-                "required": ["email", "name"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "next_topic",
-            "description": "Перейти на НАСТУПНУ тему іспиту. Викликай коли задав 3-4 запитання на поточній темі АБО студент не знає тему.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "Email студента"
-                    }
-                },
-                "required": ["email"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "end_exam",
-            "description": "Завершити іспит ТІЛЬКИ ПІСЛЯ того як next_topic повернув finished=True. Дай справедливу оцінку.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "email": {
-                        "type": "string",
-                        "description": "Email студента"
-                    },
-                    "score": {
-                        "type": "number",
-                        "description": "Оцінка 0-10 (може бути 7.5). Оцінюй справедливо!"
-                    },
-                    "feedback": {
-                        "type": "string",
-                        "description": "Мінімум 3-4 речення: що знає добре, над чим попрацювати"
-                    }
-                },
-                "required": ["email", "score", "feedback"]
-            }
-        }
-    }
-]
-
-
-def execute_function(function_name: str, arguments: dict) -> dict:
-    print(f"Виконую функцію: {function_name}")
-    print(f"Аргументи: {arguments}")
-
-    try:
-        if function_name == "start_exam":
-            result = start_exam(arguments["email"], arguments["name"])
-        elif function_name == "next_topic":
-            result = next_topic(arguments["email"])
-        elif function_name == "end_exam":
-            result = end_exam(
-                arguments["email"],
-                float(arguments["score"]),
-                arguments["feedback"]
-            )
-        else:
-            result = {"success": False, "message": f"Невідома функція: {function_name}"}
-
-        print(f"Результат: {result}")
-        return result
-
-    except Exception as e:
-        print(f"Помилка: {e}")
-        return {"success": False, "message": f"Помилка: {str(e)}"}
-
-
-SYSTEM_PROMPT = """Ти - професійний AI екзаменатор курсу Natural Language Processing (NLP).
+SYSTEM_PROMPT = f"""Ти - професійний AI екзаменатор курсу Natural Language Processing (NLP).
 
 МОВА: ТІЛЬКИ УКРАЇНСЬКА!
 
@@ -319,12 +106,7 @@ SYSTEM_PROMPT = """Ти - професійний AI екзаменатор ку
 - Дай чесну оцінку 0-10
 - Напиши детальний відгук (3-4 речення мінімум)
 
-ОЦІНЮВАННЯ:
-9-10: Глибоке розуміння, деталі, приклади
-7-8: Хороше розуміння основ
-5-6: Базове розуміння
-3-4: Слабке розуміння
-0-2: Не знає
+{GRADING_RUBRIC}
 
 ВАЖЛИВІ ПРАВИЛА:
 -ГОВОРИ ТІЛЬКИ УКРАЇНСЬКОЮ
@@ -344,40 +126,46 @@ SYSTEM_PROMPT = """Ти - професійний AI екзаменатор ку
 8. end_exam->іспит завершено!
 """
 
+SERVER_SYSTEM_PROMPT = f"""Ти - професійний AI екзаменатор курсу Natural Language Processing (NLP).
 
-def get_current_topic(email: str):
-    exam = CURRENT_EXAMS.get(email)
-    if not exam:
-        return None
-    idx = exam.get("current_topic_index", 0)
-    if idx >= len(exam.get("topics", [])):
-        return None
-    return exam["topics"][idx]
+МОВА: ТІЛЬКИ УКРАЇНСЬКА!
 
+ЕТАП 1: ПОЧАТОК
+1. Привітай студента
+2. Запитай ім'я та email
+3. ЧЕКАЙ повну інформацію (наприклад: "Іван Петренко, test@lpnu.ua")
+4. ТІЛЬКИ ТОДІ викликай start_exam
 
-def get_exam_progress(email: str) -> dict:
-    exam = CURRENT_EXAMS.get(email)
-    if not exam:
-        return {"active": False}
+ЕТАП 2: ІСПИТ ПО ТЕМАХ
+1. Поточну тему і кількість заданих запитань повідомляє система
+2. На кожну відповідь коротко оціни її і задай ОДНЕ наступне запитання з поточної теми:
+   - Перше запитання - базове
+   - Наступні - глибші
+   - Адаптуй складність під студента
+3. Теми перемикає система. Коли вона повідомляє про нову тему - переходь до неї
 
-    idx = exam.get("current_topic_index", 0)
-    topics = exam.get("topics", [])
-    questions = exam.get("questions_on_topic", 0)
+ЕТАП 3: ЗАВЕРШЕННЯ
+- Коли всі теми пройдено, викликай end_exam
+- Дай чесну оцінку 0-10
+- Напиши детальний відгук (3-4 речення мінімум)
 
-    return {
-        "active": True,
-        "current_topic": topics[idx] if idx < len(topics) else None,
-        "topic_index": idx,
-        "total_topics": len(topics),
-        "questions_on_topic": questions,
-        "all_topics_done": idx >= len(topics)
-    }
+{GRADING_RUBRIC}
+
+ВАЖЛИВІ ПРАВИЛА:
+- ГОВОРИ ТІЛЬКИ УКРАЇНСЬКОЮ
+- Поки іспит триває, закінчуй кожну відповідь одним запитанням
+- Будь чесним екзаменатором
+"""
 
+PHASE_BUNDLES = build_phase_bundles(SYSTEM_PROMPT, TOOLS)
+SERVER_PHASE_BUNDLES = build_phase_bundles(
+    SERVER_SYSTEM_PROMPT, TOOLS, SERVER_PHASE_TOOLS, {ALL_TOPICS_DONE: "end_exam"}
+)
 
-def chat_with_groq(message: str, history: List[List[str]], api_key: str) -> tuple:
+PREFETCH_INSTRUCTION = "Постав перше (базове) запитання з поточної теми. Відповідай лише текстом запитання, без вступу."
 
-    if not api_key:
-        error = """Будь ласка, введіть API ключ Groq!
+
+API_KEY_HELP = """Будь ласка, введіть API ключ Groq!
 
 Як отримати (1 хвилина):
 1. Перейдіть на https://console.groq.com/
@@ -386,148 +174,578 @@ def chat_with_groq(message: str, history: List[List[str]], api_key: str) -> tupl
 4. Натисніть "Create API Key"
 5. Скопіюйте ключ (починається з gsk_)
 6. Вставте вище"""
-        return history + [[message, error]], history
 
-    if not api_key.startswith("gsk_"):
-        error = "Невірний формат ключа Groq. Ключ має починатися з 'gsk_'"
-        return history + [[message, error]], history
 
+def _api_key_error(api_key: str):
+    if not api_key:
+        return API_KEY_HELP
+    if not api_key.startswith("gsk_"):
+        return "Невірний формат ключа Groq. Ключ має починатися з 'gsk_'"
+    return None
+
+
+def chat_with_groq(message: str, history: List[List[str]], api_key: str, session_id: str):
+    error = _api_key_error(api_key)
+    if error:
+        yield history + [[message, error]], history
+        return
+
+    session = SESSIONS.get(session_id)
+    with session.lock:
+        turn_started = time.perf_counter()
+        history = _session_transcript(session, history)
+        shown = history.rows()
+        RECORDER.begin(session, message)
+        try:
+            with client_lease(api_key) as client:
+                turn = _chat_turn(message, history, session)
+                step = next(turn)
+                calls = 0
+                while True:
+                    if "tool_calls" in step:
+                        step = turn.send(_execute_tool_calls(session, step["tool_calls"]))
+                        continue
+                    call_started, first_token = time.perf_counter(), None
+                    reply = COMPLETION_CACHE.lookup(step)
+                    cached = reply is not None
+                    if reply is None:
+                        ticket, stream = SCHEDULER.run(
+                            api_key, session.session_id, FOLLOW_UP if calls else FRESH_TURN, _request_tokens(step),
+                            lambda: client.chat.completions.create(**step["params"])
+                        )
+                        assembler = ReplyAssembler()
+                        early_stop = REPLY_BUDGET.stops_after_question(step)
+                        for chunk in stream:
+                            if assembler.feed(chunk):
+                                first_token = first_token or time.perf_counter()
+                                if early_stop and assembler.stop_after_question():
+                                    close_stream(stream)
+                                    break
+                                yield shown + [[message, assembler.content]], history
+                        reply = assembler.reply()
+                        REPLY_BUDGET.observe(step["step"], reply)
+                        SCHEDULER.settle(ticket, reply["usage"])
+                        MODEL_ROUTER.observe(step["params"]["model"], time.perf_counter() - call_started, reply["usage"])
+                        COMPLETION_CACHE.store(step, reply)
+                    _record_completion(calls, call_started, first_token, reply)
+                    RECORDER.step(session, step, reply, cached, time.perf_counter() - call_started)
+                    calls += 1
+                    step = turn.send(reply)
+        except StopIteration as done:
+            TURN_SECONDS.observe(time.perf_counter() - turn_started, outcome="ok")
+            _schedule_prefetch(api_key, session)
+            RECORDER.end(session, answer=done.value[0][-1][1])
+            yield done.value
+        except Exception as e:
+            TURN_SECONDS.observe(time.perf_counter() - turn_started, outcome="error")
+            RECORDER.end(session, error=str(e))
+            yield _turn_error(message, history, e)
+
+
+async def chat_with_groq_async(message: str, history: List[List[str]], api_key: str, session_id: str):
+    error = _api_key_error(api_key)
+    if error:
+        yield history + [[message, error]], history
+        return
+
+    session = SESSIONS.get(session_id)
+    async with session.async_lock:
+        turn_started = time.perf_counter()
+        history = _session_transcript(session, history)
+        shown = history.rows()
+        RECORDER.begin(session, message)
+        try:
+            with client_lease(api_key, asynchronous=True) as client:
+                turn = _chat_turn(message, history, session)
+                step, done = await _off_loop(_advance, turn)
+                calls = 0
+                while done is None:
+                    if "tool_calls" in step:
+                        outcomes = await _execute_tool_calls_async(session, step["tool_calls"])
+                        step, done = await _off_loop(_advance, turn, outcomes)
+                        continue
+                    call_started, first_token = time.perf_counter(), None
+                    reply = COMPLETION_CACHE.lookup(step)
+                    cached = reply is not None
+                    if reply is None:
+                        ticket, stream = await SCHEDULER.run_async(
+                            api_key, session.session_id, FOLLOW_UP if calls else FRESH_TURN, _request_tokens(step),
+                            lambda: client.chat.completions.create(**step["params"])
+                        )
+                        assembler = ReplyAssembler()
+                        early_stop = REPLY_BUDGET.stops_after_question(step)
+                        async for chunk in stream:
+                            if assembler.feed(chunk):
+                                first_token = first_token or time.perf_counter()
+                                if early_stop and assembler.stop_after_question():
+                                    await aclose_stream(stream)
+                                    break
+                                yield shown + [[message, assembler.content]], history
+                        reply = assembler.reply()
+                        REPLY_BUDGET.observe(step["step"], reply)
+                        SCHEDULER.settle(ticket, reply["usage"])
+                        MODEL_ROUTER.observe(step["params"]["model"], time.perf_counter() - call_started, reply["usage"])
+                        COMPLETION_CACHE.store(step, reply)
+                    _record_completion(calls, call_started, first_token, reply)
+                    RECORDER.step(session, step, reply, cached, time.perf_counter() - call_started)
+                    calls += 1
+                    step, done = await _off_loop(_advance, turn, reply)
+            await _off_loop(_schedule_prefetch, api_key, session)
+        except Exception as e:
+            TURN_SECONDS.observe(time.perf_counter() - turn_started, outcome="error")
+            RECORDER.end(session, error=str(e))
+            yield _turn_error(message, history, e)
+            return
+        TURN_SECONDS.observe(time.perf_counter() - turn_started, outcome="ok")
+        RECORDER.end(session, answer=done[0][-1][1])
+        yield done
+
+
+def _advance(turn, value=None) -> tuple:
     try:
-        client = Groq(api_key=api_key)
+        return turn.send(value), None
+    except StopIteration as done:
+        return None, done.value
 
-        active_email = next(iter(CURRENT_EXAMS.keys()), None)
-        progress = get_exam_progress(active_email) if active_email else {"active": False}
 
-        print(f" Прогрес: email={active_email}")
-        if progress["active"]:
-            print(f"   Тема {progress['topic_index']+1}/{progress['total_topics']}: {progress['current_topic']}")
-            print(f"   Запитань на темі: {progress['questions_on_topic']}")
-            print(f"   Всі теми пройдено: {progress['all_topics_done']}")
+async def _off_loop(function, *args):
+    if not STATE.remote:
+        return function(*args)
+    return await asyncio.get_running_loop().run_in_executor(STATE_EXECUTOR, function, *args)
 
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
 
-        if progress["active"] and progress["current_topic"]:
-            context = f"""
-ПОТОЧНИЙ СТАН ІСПИТУ:
-- Тема {progress['topic_index']+1}/{progress['total_topics']}: {progress['current_topic']}
-- Запитань на цій темі: {progress['questions_on_topic']}
+def _session_transcript(session, history) -> Transcript:
+    transcript = session.transcript
+    if history is not transcript and len(history) > len(transcript):
+        transcript.extend(history[len(transcript):])
+    return transcript
 
-{"УВАГА: Задав вже " + str(progress['questions_on_topic']) + " запитань на цій темі!" if progress['questions_on_topic'] >= 3 else ""}
-{" ЧАС ВИКЛИКАТИ next_topic!" if progress['questions_on_topic'] >= 3 else "Продовжуй задавати запитання по цій темі"}
-            """
-            messages.append({"role": "system", "content": context})
 
-        for user_msg, assistant_msg in history:
-            messages.append({"role": "user", "content": user_msg})
-            if assistant_msg:
-                messages.append({"role": "assistant", "content": assistant_msg})
+def _request_tokens(step: dict) -> int:
+    params = step["params"]
+    return estimate_messages_tokens(params["messages"]) + params["max_tokens"]
 
-        messages.append({"role": "user", "content": message})
 
-        available_tools = []
+def _record_completion(index: int, started: float, first_token: float, reply: dict):
+    TURN_PHASE_SECONDS.observe(time.perf_counter() - started, phase="groq_call" if index == 0 else "followup")
+    if first_token:
+        FIRST_TOKEN_SECONDS.observe(first_token - started)
+    usage = reply.get("usage")
+    if usage:
+        GROQ_TOKENS.inc(usage["prompt_tokens"], direction="prompt")
+        GROQ_TOKENS.inc(usage["completion_tokens"], direction="completion")
 
-        if not progress["active"]:
-            available_tools = [t for t in TOOLS if t["function"]["name"] == "start_exam"]
-            print("🔧 Режим: очікування start_exam")
-
-        elif progress["all_topics_done"]:
-            available_tools = [t for t in TOOLS if t["function"]["name"] == "end_exam"]
-            print(" Режим: ДОЗВОЛЕНО end_exam (всі теми пройдено)")
-
-        else:
-            available_tools = [t for t in TOOLS if t["function"]["name"] == "next_topic"]
-            print(f" Режим: дозволено next_topic (питань на темі: {progress['questions_on_topic']})")
-
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            tools=available_tools if available_tools else None,
-            tool_choice="auto" if available_tools else "none",
-            max_tokens=500,
-            temperature=0.7
+
+def _schedule_prefetch(api_key: str, session):
+    if not PREFETCHER.enabled or TOPIC_CONTROL == "server":
+        return
+    exam = CURRENT_EXAMS.get(session.email)
+    if not exam:
+        return
+    topic_index = exam.topic_index + 1
+    if topic_index >= exam.total_topics or exam.questions_on_topic < PREFETCH_AFTER:
+        return
+    if QUESTION_BANK is not None and QUESTION_BANK.questions(exam.topic(topic_index)):
+        return
+    PREFETCHER.schedule(
+        session.email, exam.start_time, topic_index,
+        lambda: _prefetch_question(api_key, session.session_id, exam, topic_index)
+    )
+
+
+def _prefetch_question(api_key: str, session_id: str, exam: ExamRecord, topic_index: int) -> str:
+    bundle = PHASE_BUNDLES[IN_TOPIC]
+    messages = [
+        bundle.system_message,
+        {"role": "system", "content": progress_context(topic_index + 1, exam.total_topics, exam.topic(topic_index), 0)},
+        {"role": "system", "content": PREFETCH_INSTRUCTION}
+    ]
+    params = {
+        "model": MODEL_ROUTER.model_for("prefetch"),
+        "messages": messages,
+        "max_tokens": REPLY_BUDGET.max_tokens("prefetch"),
+        "temperature": 0.7
+    }
+    started = time.perf_counter()
+    with client_lease(api_key) as client:
+        ticket, response = SCHEDULER.run(
+            api_key, session_id, PREFETCH, estimate_messages_tokens(messages) + params["max_tokens"],
+            lambda: client.chat.completions.create(**params)
         )
+    reply = reply_from_response(response)
+    REPLY_BUDGET.observe("prefetch", reply)
+    SCHEDULER.settle(ticket, reply["usage"])
+    MODEL_ROUTER.observe(params["model"], time.perf_counter() - started, reply["usage"])
+    if reply["usage"]:
+        GROQ_TOKENS.inc(reply["usage"]["prompt_tokens"], direction="prompt")
+        GROQ_TOKENS.inc(reply["usage"]["completion_tokens"], direction="completion")
+    return reply["content"]
+
+
+def _bank_seed(email: str, start_time: str) -> str:
+    return f"{email}|{start_time}"
+
+
+def _opening_reply(session, step: str, tool_message: str):
+    exam = CURRENT_EXAMS.get(session.email)
+    if not exam:
+        return None
+    topic, topic_index = exam.current_topic, exam.topic_index
+    if topic is None:
+        return None
+
+    question = None
+    if QUESTION_BANK is not None:
+        question = QUESTION_BANK.pick(topic, _bank_seed(session.email, exam.start_time))
+        if question:
+            BANK_QUESTIONS.inc(step=step)
+    if question is None and step == "transition":
+        question = PREFETCHER.take(session.email, exam.start_time, topic_index)
+    if question is None:
+        return None
+
+    if step == "start":
+        return _local_text_reply(f"{tool_message}\n\nПочнемо з теми {topic_index + 1}/{exam.total_topics}: {topic}."
+                                 f"\n\nПерше запитання: {question}")
+    return _local_text_reply(f"{tool_message}\n\nПерше запитання: {question}")
+
+
+def chat_with_groq_blocking(message: str, history: List[List[str]], api_key: str, session_id: str) -> tuple:
+    result = history, history
+    for result in chat_with_groq(message, history, api_key, session_id):
+        pass
+    return result
+
+
+def _session_tool_call(session, function_name: str, arguments: dict) -> dict:
+    if function_name == "start_exam":
+        if session.email in CURRENT_EXAMS:
+            return {
+                "success": False,
+                "message": "Іспит уже розпочато в цій сесії. Завершіть його перед стартом нового."
+            }
+        if isinstance(arguments.get("email"), str):
+            arguments["email"] = normalize_email(arguments["email"])
+        resumed = _resume_exam(session, arguments.get("email"))
+        if resumed:
+            return resumed
+    else:
+        if not session.email:
+            return {"success": False, "message": "Не знайдено активного іспиту"}
+        arguments["email"] = session.email
+
+    result = execute_function(function_name, arguments)
+
+    if function_name == "start_exam" and result.get("success"):
+        SESSIONS.bind(session.session_id, arguments["email"])
+    return result
+
+
+def _resume_exam(session, email: str):
+    exam = CURRENT_EXAMS.get(email)
+    if not exam or SESSIONS.owner_of(email):
+        return None
+
+    SESSIONS.bind(session.session_id, email)
+    progress = get_exam_progress(email)
+    log.info("Іспит відновлено для %s", email)
+    return {
+        "success": True,
+        "resumed": True,
+        "topics": list(exam.topics),
+        "student_name": exam.name,
+        "current_topic": progress["current_topic"],
+        "message": f"Іспит відновлено для {exam.name}. "
+                   f"Поточна тема {progress['topic_index'] + 1}/{progress['total_topics']}: {progress['current_topic']}"
+    }
+
+
+def _session_progress(session) -> tuple:
+    active_email = session.email if session.email in CURRENT_EXAMS else None
+    progress = get_exam_progress(active_email) if active_email else {"active": False}
+    return active_email, progress
+
+
+def _turn_step(progress: dict) -> str:
+    if not progress["active"]:
+        return "greeting"
+    if progress["all_topics_done"]:
+        return "grading"
+    return "answer"
+
+
+def _followup_step(function_names: List[str]) -> str:
+    if "end_exam" in function_names:
+        return "finish"
+    if "next_topic" in function_names:
+        return "transition"
+    if "start_exam" in function_names:
+        return "start"
+    return "followup"
+
+
+def _phase_bundles() -> dict:
+    return SERVER_PHASE_BUNDLES if TOPIC_CONTROL == "server" else PHASE_BUNDLES
+
 
-        max_iterations = 3
-        iteration = 0
-
-        while (response.choices[0].finish_reason == "tool_calls" and iteration < max_iterations):
-            iteration += 1
-            print(f"\n Ітерація {iteration}: обробка tool calls")
-
-            tool_calls = response.choices[0].message.tool_calls
-            if not tool_calls:
-                break
-
-            print(f"   Знайдено {len(tool_calls)} tool call(s)")
-            messages.append(response.choices[0].message)
-
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                try:
-                    arguments = json.loads(tool_call.function.arguments)
-                except json.JSONDecodeError:
-                    arguments = {}
-
-                result = execute_function(function_name, arguments)
-
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": json.dumps(result, ensure_ascii=False)
-                })
-
-            progress = get_exam_progress(active_email) if active_email else {"active": False}
-
-            if not progress["active"]:
-                available_tools = [t for t in TOOLS if t["function"]["name"] == "start_exam"]
-            elif progress["all_topics_done"]:
-                available_tools = [t for t in TOOLS if t["function"]["name"] == "end_exam"]
-            else:
-                available_tools = [t for t in TOOLS if t["function"]["name"] == "next_topic"]
-
-            print(f"   Follow-up запит...")
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=messages,
-                tools=available_tools if available_tools else None,
-                tool_choice="auto" if available_tools else "none",
-                max_tokens=500,
-                temperature=0.7
+def _topic_context(progress: dict) -> str:
+    if TOPIC_CONTROL == "server":
+        return topic_state_context(
+            progress["topic_index"] + 1, progress["total_topics"],
+            progress["current_topic"], progress["questions_on_topic"], QUESTIONS_PER_TOPIC
+        )
+    return progress_context(
+        progress["topic_index"] + 1, progress["total_topics"],
+        progress["current_topic"], progress["questions_on_topic"]
+    )
+
+
+def _topic_budget_spent(progress: dict) -> bool:
+    return (TOPIC_CONTROL == "server" and progress["active"] and not progress["all_topics_done"]
+            and progress["questions_on_topic"] >= QUESTIONS_PER_TOPIC)
+
+
+def _completion_request(session, step: str, bundle: PhaseBundle, messages: list) -> dict:
+    session.completions += 1
+    reused, total = session.prefix.observe(bundle, messages)
+    PROMPT_PREFIX_TOKENS.inc(reused, kind="reused")
+    PROMPT_PREFIX_TOKENS.inc(total, kind="total")
+    return {
+        "step": step,
+        "params": {
+            "model": MODEL_ROUTER.model_for(step),
+            "messages": messages,
+            "tools": list(bundle.tools) or None,
+            "tool_choice": bundle.tool_choice,
+            "max_tokens": REPLY_BUDGET.max_tokens(step),
+            "temperature": 0.7,
+            "stream": True
+        }
+    }
+
+
+def _chat_turn(message: str, history: Transcript, session):
+    build_started = time.perf_counter()
+    active_email, progress = _session_progress(session)
+    bundles = _phase_bundles()
+
+    finished_topic = None
+    if _topic_budget_spent(progress):
+        finished_topic = progress["current_topic"]
+        next_topic(active_email)
+        session.context.close_segment(history, f"Тема {progress['topic_index'] + 1}: {finished_topic}")
+        active_email, progress = _session_progress(session)
+
+    if progress["active"]:
+        log.debug(
+            "%s: тема %d/%d, запитань %d, всі теми пройдено=%s", active_email, progress["topic_index"] + 1,
+            progress["total_topics"], progress["questions_on_topic"], progress["all_topics_done"]
+        )
+
+    bundle = bundles[phase_of(progress)]
+    tail = []
+    if progress["active"] and progress["current_topic"]:
+        tail.append({"role": "system", "content": _topic_context(progress)})
+        seed = _bank_seed(active_email, progress["start_time"])
+        if finished_topic:
+            transition = transition_context(
+                finished_topic, progress["topic_index"] + 1, progress["total_topics"], progress["current_topic"]
             )
+            question = QUESTION_BANK.pick(progress["current_topic"], seed) if QUESTION_BANK else None
+            if question:
+                BANK_QUESTIONS.inc(step="transition")
+                transition += f"\nПерше запитання нової теми (з банку, постав його дослівно): {question}"
+            tail.append({"role": "system", "content": transition})
+        elif QUESTION_BANK is not None and progress["questions_on_topic"] == 1:
+            hint = QUESTION_BANK.pick(progress["current_topic"], seed, "deeper")
+            if hint:
+                tail.append({"role": "system", "content": f"Приклад поглибленого запитання з банку (адаптуй до відповіді студента): {hint}"})
+    elif progress["active"] and TOPIC_CONTROL == "server":
+        tail.append({"role": "system", "content": GRADING_CONTEXT})
+
+    messages = session.context.build([bundle.system_message], history, message, tail)
+    if log.isEnabledFor(logging.DEBUG):
+        full_tokens = estimate_messages_tokens([bundle.system_message] + tail)
+        full_tokens += estimate_history_tokens(history + [[message, None]])
+        log.debug("Промпт: ~%d токенів (без стиснення ~%d)", estimate_messages_tokens(messages), full_tokens)
+
+    TURN_PHASE_SECONDS.observe(time.perf_counter() - build_started, phase="prompt_build")
+
+    intro = None if progress["active"] else parse_introduction(message)
+    if intro:
+        INTRO_PARSES.inc(outcome="local")
+        reply = _local_tool_reply("start_exam", {"email": intro[1], "name": intro[0]})
+    else:
+        if not progress["active"]:
+            INTRO_PARSES.inc(outcome="llm")
+        reply = yield _completion_request(session, _turn_step(progress), bundle, messages)
+
+    max_iterations = 3
+    iteration = 0
+    finished = False
+
+    while (reply["finish_reason"] == "tool_calls" and iteration < max_iterations):
+        iteration += 1
+
+        tool_calls = reply["tool_calls"]
+        if not tool_calls:
+            break
+
+        tools_started = time.perf_counter()
+        messages.append(assistant_message(reply))
+        opening_message = finish_message = None
+
+        outcomes, chains = yield {"step": "tools", "tool_calls": tool_calls}
+        RECORDER.tools(session, tool_calls, outcomes, time.perf_counter() - tools_started)
+        for tool_call, (function_name, result, exam) in zip(tool_calls, outcomes):
+            if result.get("success"):
+                if exam is not None:
+                    STORAGE.save_transcript(session.email, exam.start_time, history + [[message, None]])
+                    finished = True
+                    finish_message = f"{result['message']}\n\n{result['feedback']}"
+                if function_name == "start_exam":
+                    session.context.close_segment(history, "Ідентифікація студента")
+                    if not result.get("resumed"):
+                        opening_message = result["message"]
+                elif function_name == "next_topic" and progress.get("current_topic"):
+                    label = f"Тема {progress['topic_index'] + 1}: {progress['current_topic']}"
+                    session.context.close_segment(history, label)
+                    if not result.get("finished"):
+                        opening_message = result["message"]
+
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call["id"],
+                "name": function_name,
+                "content": json.dumps(result, ensure_ascii=False)
+            })
+
+        active_email, progress = _session_progress(session)
+        bundle = bundles[phase_of(progress)]
+
+        tools_elapsed = time.perf_counter() - tools_started
+        TURN_PHASE_SECONDS.observe(tools_elapsed, phase="tool_execution")
+        TOOL_ITERATION_SECONDS.observe(tools_elapsed, chains=str(chains))
+        step = _followup_step([call["function"]["name"] for call in tool_calls])
+        if progress["active"] and progress["all_topics_done"]:
+            step = "grading"
+        elif step == "finish" and not finished:
+            step = "followup"
+        reply = None
+        if step in ("start", "transition") and opening_message:
+            reply = _opening_reply(session, step, opening_message)
+        elif step == "finish" and finish_message and TOPIC_CONTROL == "server":
+            reply = _local_text_reply(finish_message)
+        if reply is None:
+            reply = yield _completion_request(session, step, bundle, messages)
+
+    if reply["content"]:
+        answer = reply["content"]
+    else:
+        answer = "Вибачте, я не можу відповісти. Спробуйте переформулювати питання."
+
+    TOOL_ITERATIONS.observe(iteration)
+    if finished:
+        EXAM_COMPLETIONS.observe(session.completions, control=TOPIC_CONTROL)
+        session.completions = 0
+
+    if active_email and not progress["all_topics_done"] and "?" in answer:
+        exam, _ = CURRENT_EXAMS.update(active_email, ExamRecord.count_question)
+        if exam is not None:
+            STORAGE.save_exam(active_email, exam.to_dict())
+
+    history.append([message, answer])
+    return history.rows(), history
+
+
+def _run_tool_call(session, tool_call: dict) -> tuple:
+    function_name = tool_call["function"]["name"]
+    try:
+        arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+    except json.JSONDecodeError:
+        arguments = {}
+
+    exam = CURRENT_EXAMS.get(session.email) if function_name == "end_exam" else None
+    return function_name, _session_tool_call(session, function_name, arguments), exam
+
+
+def _tool_chains(tool_calls: list) -> List[List[int]]:
+    chains: Dict[str, List[int]] = {}
+    for position, tool_call in enumerate(tool_calls):
+        name = tool_call["function"]["name"]
+        chains.setdefault("exam" if name in EXAM_STATE_TOOLS else tool_call["id"], []).append(position)
+    return list(chains.values())
+
+
+def _run_tool_chain(session, tool_calls: list, positions: List[int], outcomes: list):
+    for position in positions:
+        outcomes[position] = _run_tool_call(session, tool_calls[position])
+
+
+def _execute_tool_calls(session, tool_calls: list) -> tuple:
+    chains = _tool_chains(tool_calls)
+    outcomes = [None] * len(tool_calls)
+    if len(chains) == 1:
+        _run_tool_chain(session, tool_calls, chains[0], outcomes)
+    else:
+        futures = [TOOL_EXECUTOR.submit(_run_tool_chain, session, tool_calls, positions, outcomes)
+                   for positions in chains]
+        for future in futures:
+            future.result()
+    return outcomes, len(chains)
+
+
+async def _execute_tool_calls_async(session, tool_calls: list) -> tuple:
+    chains = _tool_chains(tool_calls)
+    outcomes = [None] * len(tool_calls)
+    if len(chains) == 1 and not STATE.remote:
+        _run_tool_chain(session, tool_calls, chains[0], outcomes)
+    else:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(TOOL_EXECUTOR, _run_tool_chain, session, tool_calls, positions, outcomes)
+            for positions in chains
+        ))
+    return outcomes, len(chains)
+
 
-        assistant_message = ""
-        if response.choices and response.choices[0].message.content:
-            assistant_message = response.choices[0].message.content
-        else:
-            assistant_message = "Вибачте, я не можу відповісти. Спробуйте переформулювати питання."
+def _local_text_reply(content: str) -> dict:
+    return {"content": content, "tool_calls": [], "finish_reason": "stop", "usage": None}
 
-        print(f"💬 Відповідь: {assistant_message[:100]}...")
 
-        if active_email and active_email in CURRENT_EXAMS and not progress["all_topics_done"]:
-            CURRENT_EXAMS[active_email]["questions_on_topic"] += 1
+def _local_tool_reply(function_name: str, arguments: dict) -> dict:
+    return {
+        "content": None,
+        "tool_calls": [{
+            "id": f"local_{function_name}",
+            "type": "function",
+            "function": {"name": function_name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+        }],
+        "finish_reason": "tool_calls",
+        "usage": None
+    }
 
-        history.append([message, assistant_message])
-        return history, history
 
-    except Exception as e:
-        error_msg = f"Помилка: {str(e)}\n\n"
+def _turn_error(message: str, history: Transcript, e: Exception) -> tuple:
+    error_msg = f"Помилка: {str(e)}\n\n"
 
-        if "authentication" in str(e).lower() or "api key" in str(e).lower():
-            error_msg += "Перевірте API ключ:\n"
-            error_msg += "- Ключ має починатися з 'gsk_'\n"
-            error_msg += "- Створіть новий на https://console.groq.com/\n"
-        elif "rate" in str(e).lower() or "limit" in str(e).lower():
-            error_msg += "Перевищено ліміт запитів.\n"
-        else:
-            error_msg += f"Деталі: {str(e)}"
+    if "authentication" in str(e).lower() or "api key" in str(e).lower():
+        error_msg += "Перевірте API ключ:\n"
+        error_msg += "- Ключ має починатися з 'gsk_'\n"
+        error_msg += "- Створіть новий на https://console.groq.com/\n"
+    elif "rate" in str(e).lower() or "limit" in str(e).lower():
+        error_msg += "Перевищено ліміт запитів.\n"
+    else:
+        error_msg += f"Деталі: {str(e)}"
 
-        print(f" ПОМИЛКА: {e}")
-        history.append([message, error_msg])
-        return history, history
+    log.error("Помилка ходу чату: %s", e)
+    history.append([message, error_msg])
+    return history.rows(), history
 
 
 def create_interface():
+    import gradio as gr
+
     with gr.Blocks(
             title="AI Examiner - Groq",
             theme=gr.themes.Soft(primary_hue="purple", secondary_hue="blue")
@@ -592,26 +810,40 @@ def create_interface():
         def show_stats():
             return get_statistics()
 
+        async def respond(message, history, api_key, request: gr.Request):
+            async for update in chat_with_groq_async(message, history, api_key, request.session_hash):
+                yield update
+
+        def new_exam(request: gr.Request):
+            email = SESSIONS.release(request.session_hash)
+            if email:
+                abandon_exam(email)
+            return [], []
+
         msg.submit(
-            chat_with_groq,
+            respond,
             inputs=[msg, chat_state, api_key_input],
-            outputs=[chatbot, chat_state]
+            outputs=[chatbot, chat_state],
+            concurrency_limit=CHAT_CONCURRENCY_LIMIT,
+            concurrency_id="chat"
         ).then(
             lambda: "",
             outputs=[msg]
         )
 
         send_btn.click(
-            chat_with_groq,
+            respond,
             inputs=[msg, chat_state, api_key_input],
-            outputs=[chatbot, chat_state]
+            outputs=[chatbot, chat_state],
+            concurrency_limit=CHAT_CONCURRENCY_LIMIT,
+            concurrency_id="chat"
         ).then(
             lambda: "",
             outputs=[msg]
         )
 
         clear_btn.click(
-            lambda: ([], []),
+            new_exam,
             outputs=[chatbot, chat_state]
         )
 
@@ -623,10 +855,57 @@ def create_interface():
     return demo
 
 
+def create_server(demo):
+    import gradio as gr
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import PlainTextResponse, StreamingResponse
+
+    server = FastAPI()
+
+    @server.get("/metrics")
+    def metrics():
+        return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+    def admin_filter(request: Request) -> ResultFilter:
+        if not ADMIN_TOKEN:
+            raise HTTPException(status_code=404)
+        if not check_admin_token(request.headers.get("authorization")):
+            raise HTTPException(status_code=401, detail="Потрібен адмін-токен", headers={"WWW-Authenticate": "Bearer"})
+        try:
+            return ResultFilter.from_params(request.query_params)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @server.get("/admin/results")
+    def admin_results(request: Request, limit: int = PAGE_LIMIT, cursor: str = ""):
+        filters = admin_filter(request)
+        try:
+            rows, next_cursor = results_page(STORAGE, filters, cursor, max(1, min(limit, PAGE_LIMIT)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"results": rows, "next_cursor": next_cursor}
+
+    @server.get("/admin/results/export")
+    def admin_export(request: Request, format: str = "csv"):
+        filters = admin_filter(request)
+        try:
+            media_type, extension, body = export_stream(STORAGE, filters, format)
+        except (ValueError, RuntimeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return StreamingResponse(body, media_type=media_type,
+                                 headers={"Content-Disposition": f'attachment; filename="results.{extension}"'})
+
+    return gr.mount_gradio_app(server, demo, path="/")
+
+
 if __name__ == "__main__":
+    import uvicorn
+
+    restore_state()
     demo = create_interface()
-    demo.launch(
-        # share=True,
-        debug=True,
-        show_error=True
-    )
\ No newline at end of file
+    demo.queue(default_concurrency_limit=CHAT_CONCURRENCY_LIMIT)
+    uvicorn.run(
+        create_server(demo),
+        host=os.getenv("GRADIO_SERVER_NAME", "127.0.0.1"),
+        port=int(os.getenv("GRADIO_SERVER_PORT", "7860"))
+    )
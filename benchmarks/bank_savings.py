@@ -0,0 +1,95 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+os.environ.setdefault("GROQ_RPM", "1000000")
+os.environ.setdefault("GROQ_TPM", "1000000000")
+
+from benchmarks.stub_groq import StubGroq  # noqa: E402
+from question_bank import QUESTION_BANK_PATH, QuestionBank, QuestionIndex  # noqa: E402
+
+
+MAX_TURNS_PER_EXAM = 40
+
+
+def run_exams(app, stub: StubGroq, exams: int, label: str) -> dict:
+    calls_before = stub.calls
+    turns = 0
+    for i in range(exams):
+        session_id = f"bank-{label}-{i}"
+        email = f"bank{label}x{i}@lpnu.ua"
+        history = []
+        message = f"Привіт! Я Студент {i}, email: {email}"
+        for _ in range(MAX_TURNS_PER_EXAM):
+            history, _ = app.chat_with_groq_blocking(message, history, "gsk_bench", session_id)
+            turns += 1
+            if app.SESSIONS.email_for(session_id) == email and email not in app.CURRENT_EXAMS:
+                break
+            message = "Моя відповідь на запитання."
+    calls = stub.calls - calls_before
+    return {"exams": exams, "turns": turns, "calls": calls, "calls_per_exam": calls / exams}
+
+
+def index_timings(path: str, queries: int) -> dict:
+    bank = QuestionBank(path)
+    texts = [text for _, _, text in bank.rows]
+
+    started = time.perf_counter()
+    index = QuestionIndex.build(texts, bank.index.fingerprint)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        index_path = os.path.join(directory, "bank.idx")
+        index.save(index_path)
+        size = os.path.getsize(index_path)
+        started = time.perf_counter()
+        loaded = QuestionIndex.load(index_path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for i in range(queries):
+            loaded.nearest(loaded.vector(texts[i % len(texts)]))
+        query_us = (time.perf_counter() - started) / queries * 1e6
+        del loaded
+
+    return {"questions": len(texts), "build_ms": build_ms, "load_ms": load_ms, "query_us": query_us, "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скільки викликів LLM на іспит заощаджує банк запитань")
+    parser.add_argument("--exams", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--bank", default=QUESTION_BANK_PATH)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        import groq_pool
+
+    stub = StubGroq()
+    groq_pool.CLIENT_POOL.factory = lambda api_key: stub
+
+    app.QUESTION_BANK = None
+    without = run_exams(app, stub, args.exams, "off")
+    app.QUESTION_BANK = QuestionBank(args.bank)
+    with_bank = run_exams(app, stub, args.exams, "bank")
+
+    for name, row in (("без банку", without), ("з банком", with_bank)):
+        print(f"{name:>10}: іспитів {row['exams']}, ходів {row['turns']}, викликів LLM {row['calls']} "
+              f"({row['calls_per_exam']:.2f} на іспит)")
+    saved = without["calls_per_exam"] - with_bank["calls_per_exam"]
+    print(f"Заощаджено: {saved:.2f} викликів на іспит ({saved / without['calls_per_exam']:.1%})")
+
+    timings = index_timings(args.bank, args.queries)
+    print(f"Індекс: {timings['questions']} запитань, {timings['bytes'] / 1024:.0f} КБ, побудова {timings['build_ms']:.1f} мс, "
+          f"mmap {timings['load_ms']:.2f} мс, пошук {timings['query_us']:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
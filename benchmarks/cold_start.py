@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("groq", "httpx", "gradio", "fastapi")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+result = {call}
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "call_ms": (done - imported) * 1000,
+    "ok": bool(result),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+TARGETS = {
+    "exam_core": ("import exam_core", "exam_core.start_exam('cold@lpnu.ua', 'Холодний Старт')['success']"),
+    "app": ("import app", "app.execute_function('start_exam', {'email': 'cold@lpnu.ua', 'name': 'Холодний Старт'})"),
+    "app+groq+gradio": (
+        "import groq, gradio, app",
+        "app.execute_function('start_exam', {'email': 'cold@lpnu.ua', 'name': 'Холодний Старт'})"
+    ),
+}
+
+
+def child_env(**extra) -> dict:
+    env = dict(os.environ, EXAM_STORAGE="none", EXAM_STATE_BACKEND="memory", EXAM_RECORD_DIR="",
+               EXAM_LOG_LEVEL="WARNING", **extra)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, os.environ.get("PYTHONPATH")) if p)
+    return env
+
+
+def run_probe(imports: str, call: str, cwd: str) -> dict:
+    code = PROBE.format(imports=imports, call=call, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=child_env(), capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if proc.returncode:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"код {proc.returncode}"}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = elapsed * 1000
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_first_request(cwd: str, timeout: float) -> float:
+    port = free_port()
+    env = child_env(GRADIO_SERVER_NAME="127.0.0.1", GRADIO_SERVER_PORT=str(port))
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"сервер завершився з кодом {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"сервер не відповів за {timeout} с")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Час імпорту й холодного старту: ядро іспиту, app і повний сервер")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--server", action="store_true", help="також виміряти час до першого запиту до app.py")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", default="", help="зберегти підсумок у JSON для порівняння між версіями")
+    args = parser.parse_args()
+
+    summary = {}
+    with tempfile.TemporaryDirectory() as cwd:
+        for name, (imports, call) in TARGETS.items():
+            runs = [run_probe(imports, call, cwd) for _ in range(args.runs)]
+            errors = [r["error"] for r in runs if "error" in r]
+            if errors:
+                print(f"{name:>16}: пропущено ({errors[0]})")
+                continue
+            row = {key: round(statistics.median(r[key] for r in runs), 1)
+                   for key in ("import_ms", "call_ms", "process_ms")}
+            row["heavy"] = runs[0]["heavy"]
+            summary[name] = row
+            print(f"{name:>16}: імпорт {row['import_ms']} мс, перший виклик {row['call_ms']} мс, "
+                  f"процес {row['process_ms']} мс, завантажено: {', '.join(row['heavy']) or '-'}")
+
+        if args.server:
+            try:
+                times = [server_first_request(cwd, args.timeout) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"{'server':>16}: пропущено ({e})")
+            else:
+                summary["server"] = {"first_request_ms": round(statistics.median(times) * 1000, 1)}
+                print(f"{'server':>16}: перший запит /metrics через {summary['server']['first_request_ms']} мс")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exam_record import NLP_TOPICS, ExamRecord  # noqa: E402
+from exam_transcript import Transcript  # noqa: E402
+from question_bank import QUESTION_BANK_PATH  # noqa: E402
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_vocabulary():
+    with open(QUESTION_BANK_PATH, encoding="utf-8") as f:
+        bank = json.load(f)
+    questions = [q for levels in bank.values() for texts in levels.values() for q in texts]
+    words = sorted({w for q in questions for w in q.split()})
+    return questions, words
+
+
+def make_turns(rng: random.Random, questions, words, turns: int):
+    history = []
+    for _ in range(turns):
+        answer = " ".join(rng.choice(words) for _ in range(rng.randint(25, 60))) + "."
+        reply = " ".join(rng.choice(words) for _ in range(rng.randint(15, 30))) + ". " + rng.choice(questions)
+        history.append([answer, reply])
+    return history
+
+
+def legacy_exam(index: int, rng: random.Random, history: list):
+    exam = {
+        "name": f"Студент Номер{index}",
+        "email": f"student{index}@lpnu.ua",
+        "start_time": datetime.now().isoformat(),
+        "topics": rng.sample(NLP_TOPICS, 3),
+        "current_topic_index": 1,
+        "questions_on_topic": 2,
+        "answers": []
+    }
+    return exam, history
+
+
+def compact_exam(index: int, rng: random.Random, history: list):
+    exam = ExamRecord.new(f"Студент Номер{index}", f"student{index}@lpnu.ua", rng.sample(range(len(NLP_TOPICS)), 3))
+    exam.topic_index, exam.questions_on_topic = 1, 2
+    return exam, Transcript(history)
+
+
+LAYOUTS = {"legacy": legacy_exam, "compact": compact_exam}
+
+
+def build(layout: str, first: int, count: int, turns: int, questions, words) -> list:
+    make = LAYOUTS[layout]
+    exams = []
+    for index in range(first, first + count):
+        rng = random.Random(index)
+        exams.append(make(index, rng, make_turns(rng, questions, words, turns)))
+    return exams
+
+
+def measure(layout: str, exams: int, turns: int, sample: int, results):
+    questions, words = load_vocabulary()
+    gc.collect()
+    before = rss_bytes()
+    started = time.perf_counter()
+    kept = build(layout, 0, exams, turns, questions, words)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    after = rss_bytes()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    probe = build(layout, exams, sample, turns, questions, words)
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    results.put({
+        "layout": layout,
+        "exams": len(kept),
+        "rss_mb": round((after - before) / 2 ** 20, 1),
+        "rss_per_exam_kb": round((after - before) / exams / 1024, 2),
+        "traced_per_exam_kb": round(traced / len(probe) / 1024, 2),
+        "build_s": round(elapsed, 2),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Памʼять на іспит: словник + список ходів проти компактного запису")
+    parser.add_argument("--exams", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    for layout in LAYOUTS:
+        process = context.Process(target=measure, args=(layout, args.exams, args.turns, args.sample, results))
+        process.start()
+        r = results.get()
+        process.join()
+        print(f"{r['layout']:>8}: {r['exams']} іспитів x {args.turns} ходів, RSS +{r['rss_mb']} МБ "
+              f"({r['rss_per_exam_kb']} КБ/іспит), tracemalloc {r['traced_per_exam_kb']} КБ/іспит, "
+              f"побудова {r['build_s']} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+os.environ.setdefault("GROQ_RPM", "1000000")
+os.environ.setdefault("GROQ_TPM", "1000000000")
+
+import app  # noqa: E402
+import exam_core  # noqa: E402
+import groq_pool  # noqa: E402
+from benchmarks.stub_groq import INTRUDER_EMAIL, AsyncStubGroq, StubGroq  # noqa: E402
+
+
+def run_session(index: int, answers: int) -> list:
+    turns = session_turns(index, answers)
+    request = next(turns)
+    try:
+        while True:
+            request = turns.send(app.chat_with_groq_blocking(*request))
+    except StopIteration as done:
+        return done.value
+
+
+async def run_session_async(index: int, answers: int) -> list:
+    turns = session_turns(index, answers)
+    request = next(turns)
+    try:
+        while True:
+            update = None
+            async for update in app.chat_with_groq_async(*request):
+                pass
+            request = turns.send(update)
+    except StopIteration as done:
+        return done.value
+
+
+def session_turns(index: int, answers: int):
+    session_id = f"load-{index}"
+    email = f"student{index}@lpnu.ua"
+    history = []
+    errors = []
+
+    history, _ = yield f"Привіт! Я Студент {index}, email: {email}", history, "gsk_stub", session_id
+    if app.SESSIONS.email_for(session_id) != email:
+        errors.append(f"{session_id}: сесію не прив'язано до {email}")
+        return errors
+
+    for _ in range(answers):
+        exam = app.CURRENT_EXAMS.get(email)
+        expected_topic = exam_core.get_current_topic(email) if exam else None
+        expected_questions = exam.questions_on_topic if exam else None
+
+        history, _ = yield "Моя відповідь.", history, "gsk_stub", session_id
+        reply = history[-1][1]
+
+        topics = {expected_topic, exam_core.get_current_topic(email)} - {None}
+        if topics and reply.startswith("Запитання по темі") and not any(t in reply for t in topics):
+            errors.append(f"{session_id}: чужа тема у відповіді: {reply!r}")
+
+        exam = app.CURRENT_EXAMS.get(email)
+        if exam and expected_questions is not None and exam.questions_on_topic not in (expected_questions + 1, 0, 1):
+            errors.append(f"{session_id}: лічильник запитань {expected_questions} -> {exam.questions_on_topic}")
+
+    if INTRUDER_EMAIL in app.CURRENT_EXAMS:
+        errors.append(f"{session_id}: tool call з чужим email змінив стан")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Паралельні сесії іспиту проти stub Groq клієнта")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--answers", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--mode", choices=["threads", "async"], default="async")
+    args = parser.parse_args()
+
+    groq_pool.CLIENT_POOL.factory = lambda api_key: StubGroq(latency=args.latency)
+    groq_pool.CLIENT_POOL.async_factory = lambda api_key: AsyncStubGroq(latency=args.latency)
+
+    async def run_async():
+        return await asyncio.gather(*(run_session_async(i, args.answers) for i in range(args.sessions)))
+
+    started = time.perf_counter()
+    if args.mode == "async":
+        results = asyncio.run(run_async())
+    else:
+        with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+            results = list(executor.map(lambda i: run_session(i, args.answers), range(args.sessions)))
+    elapsed = time.perf_counter() - started
+
+    errors = [e for r in results for e in r]
+    turns = args.sessions * (args.answers + 1)
+    finished = sum(1 for i in range(args.sessions) if f"student{i}@lpnu.ua" not in app.CURRENT_EXAMS)
+
+    print(f"Сесій: {args.sessions}, ходів: {turns}, завершено іспитів: {finished}")
+    print(f"Час: {elapsed:.2f} с, {turns / elapsed:.1f} ходів/с")
+    print(f"Перетинів стану між сесіями: {len(errors)}")
+    for e in errors[:20]:
+        print(f"  {e}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_groq import scripted_reply  # noqa: E402
+from exam_context import estimate_messages_tokens, estimate_tokens  # noqa: E402
+
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+class MockGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, latency: float = 0.05, token_delay: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.requests = 0
+        self.prompt_tokens = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, prompt_tokens: int):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens.append(prompt_tokens)
+
+    def start(self) -> "MockGroqServer":
+        threading.Thread(target=self.serve_forever, name="mock-groq", daemon=True).start()
+        return self
+
+
+def _completion_payload(reply: dict, model: str, usage: dict) -> dict:
+    message = {"role": "assistant", "content": reply.get("content")}
+    finish_reason = "stop"
+    if "tool_call" in reply:
+        name, arguments = reply["tool_call"]
+        message["tool_calls"] = [{
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+        }]
+        finish_reason = "tool_calls"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+
+
+def _stream_chunks(reply: dict, model: str, usage: dict):
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": model}
+
+    def chunk(delta, finish_reason=None, extra=None):
+        payload = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+        if extra:
+            payload.update(extra)
+        return payload
+
+    yield chunk({"role": "assistant", "content": ""})
+    if "tool_call" in reply:
+        name, arguments = reply["tool_call"]
+        encoded = json.dumps(arguments, ensure_ascii=False)
+        half = len(encoded) // 2
+        yield chunk({"tool_calls": [{"index": 0, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                                     "function": {"name": name, "arguments": encoded[:half]}}]})
+        yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": encoded[half:]}}]})
+        finish_reason = "tool_calls"
+    else:
+        for word in (reply.get("content") or "").split(" "):
+            yield chunk({"content": word + " "})
+        finish_reason = "stop"
+    yield chunk({}, finish_reason, {"x_groq": {"id": base["id"], "usage": usage}})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != COMPLETIONS_PATH:
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        messages = body.get("messages", [])
+        reply = scripted_reply(messages, body.get("tools"))
+        prompt_tokens = estimate_messages_tokens(messages)
+        completion_tokens = estimate_tokens(reply.get("content") or json.dumps(reply.get("tool_call")))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        self.server.record(prompt_tokens)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        model = body.get("model", "mock")
+        if not body.get("stream"):
+            data = json.dumps(_completion_payload(reply, model, usage), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for payload in _stream_chunks(reply, model, usage):
+            self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n")
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальний Groq-сумісний сервер зі сценарними відповідями")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockGroqServer((args.host, args.port), args.latency, args.token_delay)
+    print(f"Mock Groq: {server.base_url} (GROQ_BASE_URL)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
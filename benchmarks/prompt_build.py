@@ -0,0 +1,93 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+
+from exam_context import ExamContext  # noqa: E402
+from prompt_bundles import PrefixTracker, phase_of, progress_context  # noqa: E402
+
+
+def exam_progress(total_topics: int, questions_per_topic: int):
+    yield {"active": False, "all_topics_done": False, "current_topic": None}
+    for topic_index in range(total_topics):
+        for questions in range(questions_per_topic):
+            yield {
+                "active": True, "all_topics_done": False, "topic_index": topic_index,
+                "total_topics": total_topics, "current_topic": f"Тема {topic_index}", "questions_on_topic": questions
+            }
+    yield {"active": True, "all_topics_done": True, "current_topic": None}
+
+
+def legacy_build(app, context: ExamContext, history: list, message: str, progress: dict):
+    head = [{"role": "system", "content": app.SYSTEM_PROMPT}]
+    if progress["active"] and progress["current_topic"]:
+        head.append({"role": "system", "content": f"""
+ПОТОЧНИЙ СТАН ІСПИТУ:
+- Тема {progress['topic_index']+1}/{progress['total_topics']}: {progress['current_topic']}
+- Запитань на цій темі: {progress['questions_on_topic']}
+
+{"УВАГА: Задав вже " + str(progress['questions_on_topic']) + " запитань на цій темі!" if progress['questions_on_topic'] >= 3 else ""}
+{" ЧАС ВИКЛИКАТИ next_topic!" if progress['questions_on_topic'] >= 3 else "Продовжуй задавати запитання по цій темі"}
+            """})
+    if not progress["active"]:
+        name = "start_exam"
+    elif progress["all_topics_done"]:
+        name = "end_exam"
+    else:
+        name = "next_topic"
+    tools = [t for t in app.TOOLS if t["function"]["name"] == name]
+    return context.build(head, history, message), tools
+
+
+def bundle_build(app, context: ExamContext, history: list, message: str, progress: dict):
+    bundle = app.PHASE_BUNDLES[phase_of(progress)]
+    tail = []
+    if progress["active"] and progress["current_topic"]:
+        tail.append({"role": "system", "content": progress_context(
+            progress["topic_index"] + 1, progress["total_topics"],
+            progress["current_topic"], progress["questions_on_topic"]
+        )})
+    return context.build([bundle.system_message], history, message, tail), list(bundle.tools)
+
+
+def run(app, build, exams: int, total_topics: int, questions: int) -> dict:
+    elapsed = 0.0
+    turns = reused = total = 0
+    for _ in range(exams):
+        context, tracker, history = ExamContext(), PrefixTracker(), []
+        for progress in exam_progress(total_topics, questions):
+            message = f"Відповідь студента на хід {len(history)}"
+            started = time.perf_counter()
+            messages, _ = build(app, context, history, message, progress)
+            elapsed += time.perf_counter() - started
+            r, t = tracker.observe(app.PHASE_BUNDLES[phase_of(progress)], messages)
+            reused, total, turns = reused + r, total + t, turns + 1
+            history.append([message, "Наступне запитання екзаменатора щодо теми?"])
+    return {
+        "us_per_turn": round(elapsed / turns * 1e6, 1),
+        "prefix_reuse": round(reused / total, 3) if total else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Побудова промпту: перебудова на кожен хід проти фазових пакетів")
+    parser.add_argument("--exams", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--questions", type=int, default=4)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    for name, build in (("legacy", legacy_build), ("bundles", bundle_build)):
+        result = run(app, build, args.exams, args.topics, args.questions)
+        print(f"{name:>8}: {result['us_per_turn']:>8} мкс/хід, повторно використаний префікс {result['prefix_reuse']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
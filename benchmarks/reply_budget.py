@@ -0,0 +1,124 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+os.environ.setdefault("GROQ_RPM", "1000000")
+os.environ.setdefault("GROQ_TPM", "1000000000")
+
+from benchmarks.bank_savings import run_exams  # noqa: E402
+from benchmarks.stub_groq import StubGroq, build_chunks, build_response, scripted_reply  # noqa: E402
+from exam_context import estimate_tokens  # noqa: E402
+from reply_budget import DEFAULT_BUDGETS, MAX_TOKENS, ReplyBudget  # noqa: E402
+
+
+TAIL = ("\n\nПідказка: подумайте, як ця тема повʼязана з попередніми, і наведіть приклад з практики. "
+        "Не поспішайте, структуруйте відповідь і поясніть терміни, які використовуєте.")
+
+# (медіана, розкид) довжини відповіді в токенах для логнормального розподілу
+LENGTHS = {
+    "greeting": (40, 0.4),
+    "start": (110, 0.35),
+    "transition": (80, 0.4),
+    "answer": (90, 0.45),
+    "finish": (70, 0.4),
+    "grading": (180, 0.35),
+    "prefetch": (35, 0.3),
+}
+
+
+class _TailCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, tools=None, stream=False, max_tokens=None, **kwargs):
+        self.owner.calls += 1
+        reply = scripted_reply(messages, tools)
+        if reply.get("content", "").endswith("?"):
+            reply["content"] += TAIL
+        if not stream:
+            return build_response(reply)
+        return self.owner.pace(build_chunks(reply, piece=4))
+
+
+class TailStubGroq(StubGroq):
+    def __init__(self, chunk_delay: float):
+        super().__init__()
+        self.chunk_delay = chunk_delay
+        self.streamed_tokens = 0
+        self.chat = SimpleNamespace(completions=_TailCompletions(self))
+
+    def pace(self, chunks):
+        for chunk in chunks:
+            text = chunk.choices[0].delta.content
+            if text:
+                self.streamed_tokens += estimate_tokens(text)
+                time.sleep(self.chunk_delay)
+            yield chunk
+
+
+def early_stop_run(app, budget, stub: TailStubGroq, exams: int, enabled: bool) -> dict:
+    budget.early_stop = enabled
+    tokens_before = stub.streamed_tokens
+    started = time.perf_counter()
+    row = run_exams(app, stub, exams, "stop" if enabled else "full")
+    elapsed = time.perf_counter() - started
+    return dict(row, seconds_per_turn=elapsed / row["turns"], tokens_per_exam=(stub.streamed_tokens - tokens_before) / exams)
+
+
+def tuning_run(samples: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    budget = ReplyBudget(DEFAULT_BUDGETS, autotune=True)
+    rows = {}
+    for step, (median, sigma) in LENGTHS.items():
+        truncated, reserved = 0, 0
+        for i in range(samples):
+            wanted = max(1, round(median * rng.lognormvariate(0, sigma)))
+            limit = budget.max_tokens(step)
+            if i >= samples // 2:
+                reserved += limit
+                truncated += wanted > limit
+            budget.observe(step, {
+                "content": None, "tool_calls": [], "usage": {"prompt_tokens": 0, "completion_tokens": min(wanted, limit)},
+                "finish_reason": "length" if wanted > limit else "stop",
+            })
+        tail = samples - samples // 2
+        rows[step] = {"budget": budget.max_tokens(step), "reserved": reserved / tail, "truncated": truncated / tail}
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ліміти max_tokens за кроком і зупинка після запитання")
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--chunk-delay", type=float, default=0.002, help="затримка на фрагмент потоку, с")
+    parser.add_argument("--samples", type=int, default=2000, help="відповідей на крок для автопідбору")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        import groq_pool
+
+    stub = TailStubGroq(args.chunk_delay)
+    groq_pool.CLIENT_POOL.factory = lambda api_key: stub
+    app.QUESTION_BANK = None
+
+    for enabled in (False, True):
+        row = early_stop_run(app, app.REPLY_BUDGET, stub, args.exams, enabled)
+        print(f"зупинка після запитання {'увімк' if enabled else 'вимк'}: ходів {row['turns']}, "
+              f"{row['seconds_per_turn'] * 1000:.1f} мс на хід, {row['tokens_per_exam']:.0f} токенів відповіді на іспит")
+
+    print(f"Автопідбір max_tokens (p95 x запас, {args.samples} відповідей на крок, фіксований ліміт {MAX_TOKENS}):")
+    for step, row in tuning_run(args.samples, args.seed).items():
+        print(f"  {step:>10}: ліміт {row['budget']:>3}, резерв {row['reserved']:.0f} токенів на запит "
+              f"({1 - row['reserved'] / MAX_TOKENS:.0%} менше), обрізано {row['truncated']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
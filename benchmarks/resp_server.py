@@ -0,0 +1,212 @@
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+
+class RespStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: Dict[bytes, object] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.versions: Dict[bytes, int] = {}
+
+    def touch(self, key: bytes):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def live(self, key: bytes):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+            self.touch(key)
+        return self.values.get(key)
+
+
+class CommandError(Exception):
+    pass
+
+
+NIL_ARRAY = object()
+
+
+def _execute(store: RespStore, args: List[bytes]):
+    name = args[0].upper()
+    if name == b"PING":
+        return "PONG"
+    if name in (b"CLIENT", b"SELECT"):
+        return "OK"
+    if name == b"FLUSHDB":
+        for key in list(store.values):
+            store.touch(key)
+        store.values.clear()
+        store.expires.clear()
+        return "OK"
+    if name == b"GET":
+        value = store.live(args[1])
+        if value is not None and not isinstance(value, bytes):
+            raise CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+    if name == b"SET":
+        key, value = args[1], args[2]
+        options = [a.upper() for a in args[3:]]
+        if b"NX" in options and store.live(key) is not None:
+            return None
+        store.values[key] = value
+        store.expires.pop(key, None)
+        if b"EX" in options:
+            store.expires[key] = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+        store.touch(key)
+        return "OK"
+    if name == b"DEL":
+        removed = 0
+        for key in args[1:]:
+            if store.live(key) is not None:
+                del store.values[key]
+                store.expires.pop(key, None)
+                store.touch(key)
+                removed += 1
+        return removed
+    if name == b"EXISTS":
+        return sum(1 for key in args[1:] if store.live(key) is not None)
+    if name in (b"SADD", b"SREM"):
+        members: Set[bytes] = store.values.setdefault(args[1], set())
+        before = len(members)
+        if name == b"SADD":
+            members.update(args[2:])
+        else:
+            members.difference_update(args[2:])
+        if not members:
+            del store.values[args[1]]
+        store.touch(args[1])
+        return abs(len(members) - before)
+    if name == b"SCARD":
+        return len(store.live(args[1]) or ())
+    if name == b"SMEMBERS":
+        return list(store.live(args[1]) or ())
+    raise CommandError(f"ERR unknown command '{name.decode()}'")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def encode(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if value is NIL_ARRAY:
+            return b"*-1\r\n"
+        if isinstance(value, str):
+            return b"+" + value.encode() + b"\r\n"
+        if isinstance(value, CommandError):
+            return b"-" + str(value).encode() + b"\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(self.encode(v) for v in value)
+        raise TypeError(type(value))
+
+    def handle(self):
+        store: RespStore = self.server.store
+        watched: Dict[bytes, int] = {}
+        queued: Optional[List[List[bytes]]] = None
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            name = args[0].upper()
+
+            if name == b"MULTI":
+                queued = []
+                reply = "OK"
+            elif name == b"DISCARD":
+                queued, reply = None, "OK"
+                watched.clear()
+            elif name == b"WATCH":
+                with store.lock:
+                    for key in args[1:]:
+                        store.live(key)
+                        watched[key] = store.versions.get(key, 0)
+                reply = "OK"
+            elif name == b"UNWATCH":
+                watched.clear()
+                reply = "OK"
+            elif name == b"EXEC":
+                if queued is None:
+                    reply = CommandError("ERR EXEC without MULTI")
+                else:
+                    with store.lock:
+                        if any(store.versions.get(k, 0) != v for k, v in watched.items()):
+                            reply = NIL_ARRAY
+                            self.server.aborted += 1
+                        else:
+                            reply = []
+                            for command in queued:
+                                try:
+                                    reply.append(_execute(store, command))
+                                except CommandError as e:
+                                    reply.append(e)
+                    queued = None
+                    watched.clear()
+            elif queued is not None:
+                queued.append(args)
+                reply = "QUEUED"
+            else:
+                try:
+                    with store.lock:
+                        reply = _execute(store, args)
+                except CommandError as e:
+                    reply = e
+                except (IndexError, ValueError):
+                    reply = CommandError("ERR wrong number of arguments")
+            self.wfile.write(self.encode(reply))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, _Handler)
+        self.store = RespStore()
+        self.aborted = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "RespServer":
+        threading.Thread(target=self.serve_forever, name="resp-server", daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Мінімальний Redis-сумісний сервер для локальних тестів спільного стану")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = RespServer((args.host, args.port))
+    print(f"RESP сервер: {server.url} (EXAM_STATE_BACKEND)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+os.environ.setdefault("GROQ_RPM", "1000000")
+os.environ.setdefault("GROQ_TPM", "1000000000")
+
+from benchmarks.mock_groq_server import MockGroqServer  # noqa: E402
+
+
+MAX_TURNS_PER_EXAM = 40
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_exam(app, index: int, run_id: str, latencies: list):
+    session_id = f"bench-{run_id}-{index}"
+    email = f"bench{run_id}x{index}@lpnu.ua"
+    history = []
+    message = f"Привіт! Я Студент {index}, email: {email}"
+
+    for _ in range(MAX_TURNS_PER_EXAM):
+        started = time.perf_counter()
+        async for history, _ in app.chat_with_groq_async(message, history, "gsk_bench", session_id):
+            pass
+        latencies.append(time.perf_counter() - started)
+        if app.SESSIONS.email_for(session_id) == email and email not in app.CURRENT_EXAMS:
+            return True
+        message = "Моя відповідь на запитання."
+    return False
+
+
+async def run_level(app, server: MockGroqServer, concurrency: int) -> dict:
+    latencies = []
+    requests_before = server.requests
+    tokens_before = len(server.prompt_tokens)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    finished = await asyncio.gather(*(run_exam(app, i, str(concurrency), latencies) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    prompt_tokens = server.prompt_tokens[tokens_before:]
+    return {
+        "concurrency": concurrency,
+        "exams_finished": sum(finished),
+        "turns": len(latencies),
+        "completions": server.requests - requests_before,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "prompt_tokens_per_turn": round(sum(prompt_tokens) / len(latencies), 1) if latencies else 0.0,
+        "memory_per_exam_kb": round((peak - baseline) / concurrency / 1024, 1),
+    }
+
+
+def print_report(rows: list):
+    header = ("exams", "done", "turns", "compl", "turns/s", "p50 ms", "p95 ms", "p99 ms", "prompt tok/turn", "KB/exam")
+    print(" | ".join(f"{h:>9}" for h in header))
+    for r in rows:
+        values = (r["concurrency"], r["exams_finished"], r["turns"], r["completions"], r["turns_per_s"],
+                  r["p50_ms"], r["p95_ms"], r["p99_ms"], r["prompt_tokens_per_turn"], r["memory_per_exam_kb"])
+        print(" | ".join(f"{v:>9}" for v in values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк повних іспитів проти локального mock Groq сервера")
+    parser.add_argument("--levels", default="1,10,100,1000")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", default="")
+    args = parser.parse_args()
+
+    server = MockGroqServer(("127.0.0.1", 0), args.latency, args.token_delay).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ["GROQ_HTTP_MAX_CONNECTIONS"] = str(args.connections)
+    os.environ["GROQ_HTTP_MAX_KEEPALIVE"] = str(args.connections)
+
+    import contextlib
+    import io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    async def run_all():
+        rows = []
+        for level in (int(x) for x in args.levels.split(",")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows.append(await run_level(app, server, level))
+        return rows
+
+    rows = asyncio.run(run_all())
+    print_report(rows)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
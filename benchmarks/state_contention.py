@@ -0,0 +1,90 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.resp_server import RespServer  # noqa: E402
+
+
+def _increment(exam: dict):
+    exam["questions_on_topic"] += 1
+
+
+def worker(url: str, exams: int, increments: int, threads: int, results):
+    os.environ["EXAM_STATE_BACKEND"] = url
+    from state_backend import StateBackend
+
+    backend = StateBackend(url)
+    exams_map = backend.map("exams")
+    wins = []
+
+    def run():
+        for _ in range(increments):
+            for i in range(exams):
+                exams_map.update(f"student{i}@lpnu.ua", _increment)
+        for i in range(exams):
+            if exams_map.pop(f"finish{i}@lpnu.ua") is not None:
+                wins.append(i)
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put(len(wins))
+    backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конкурентні оновлення спільного стану іспитів з кількох процесів")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--exams", type=int, default=20)
+    parser.add_argument("--increments", type=int, default=10)
+    parser.add_argument("--url", default="", help="Redis URL; за замовчуванням локальний RESP сервер")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if not url:
+        server = RespServer().start()
+        url = server.url
+
+    from state_backend import StateBackend
+    backend = StateBackend(url)
+    exams_map = backend.map("exams")
+    for i in range(args.exams):
+        exams_map.put(f"student{i}@lpnu.ua", {"current_topic_index": 0, "questions_on_topic": 0})
+        exams_map.put(f"finish{i}@lpnu.ua", {"current_topic_index": 3, "questions_on_topic": 0})
+
+    results = multiprocessing.Queue()
+    started = time.perf_counter()
+    processes = [
+        multiprocessing.Process(target=worker, args=(url, args.exams, args.increments, args.threads, results))
+        for _ in range(args.processes)
+    ]
+    for p in processes:
+        p.start()
+    wins = sum(results.get() for _ in processes)
+    for p in processes:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    expected = args.processes * args.threads * args.increments
+    lost = sum(expected - exams_map.get(f"student{i}@lpnu.ua")["questions_on_topic"] for i in range(args.exams))
+    updates = expected * args.exams
+    print(f"Процесів: {args.processes} x {args.threads} потоків, оновлень: {updates}, час: {elapsed:.2f} с "
+          f"({updates / elapsed:.0f} оновлень/с)")
+    print(f"Втрачених оновлень: {lost}, завершень одного іспиту кількома воркерами: {wins - args.exams}")
+    if server is not None:
+        print(f"Відхилених транзакцій (WATCH): {server.aborted}")
+    backend.close()
+    sys.exit(1 if lost or wins != args.exams else 0)
+
+
+if __name__ == "__main__":
+    main()
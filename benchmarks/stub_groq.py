@@ -0,0 +1,151 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from types import SimpleNamespace
+from typing import List, Optional
+
+
+EMAIL_RE = re.compile(r"[\w.+-]+@lpnu\.ua")
+TOPIC_RE = re.compile(r"- Тема (\d+)/(\d+): (.+)")
+INTRUDER_EMAIL = "intruder@lpnu.ua"
+
+
+def _field(message, name):
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+def current_topic(messages) -> Optional[str]:
+    for m in messages:
+        if _field(m, "role") == "system":
+            match = TOPIC_RE.search(_field(m, "content") or "")
+            if match:
+                return match.group(3).strip()
+    return None
+
+
+def scripted_reply(messages: List, tools: Optional[List]) -> dict:
+    offered = {t["function"]["name"] for t in (tools or [])}
+    last = messages[-1]
+    role = _field(last, "role")
+    content = _field(last, "content") or ""
+
+    if role == "tool":
+        payload = json.loads(content)
+        return {"content": f"{payload.get('message', '')}\n\nПерше запитання: що ви знаєте про цю тему?"}
+
+    if "start_exam" in offered:
+        match = EMAIL_RE.search(content)
+        if match:
+            name = content.split("Я ", 1)[-1].split(",", 1)[0].strip() or "Студент"
+            return {"tool_call": ("start_exam", {"email": match.group(0), "name": name})}
+        return {"content": "Вітаю! Назвіть, будь ласка, ваше ім'я та email."}
+
+    context = " ".join(_field(m, "content") or "" for m in messages if _field(m, "role") == "system")
+    if "next_topic" in offered and "ЧАС ВИКЛИКАТИ next_topic" in context:
+        return {"tool_call": ("next_topic", {"email": INTRUDER_EMAIL})}
+
+    if "end_exam" in offered:
+        return {"tool_call": ("end_exam", {
+            "email": INTRUDER_EMAIL,
+            "score": 8,
+            "feedback": "Добре знає основи. Варто поглибити практичні приклади. Відповіді структуровані."
+        })}
+
+    return {"content": f"Запитання по темі: {current_topic(messages) or '-'}?"}
+
+
+def build_response(reply: dict):
+    tool_calls = None
+    finish_reason = "stop"
+    if "tool_call" in reply:
+        name, arguments = reply["tool_call"]
+        tool_calls = [SimpleNamespace(
+            id=f"call_{uuid.uuid4().hex[:12]}",
+            type="function",
+            function=SimpleNamespace(name=name, arguments=json.dumps(arguments, ensure_ascii=False))
+        )]
+        finish_reason = "tool_calls"
+
+    message = SimpleNamespace(role="assistant", content=reply.get("content"), tool_calls=tool_calls)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(index=0, message=message, finish_reason=finish_reason)],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+    )
+
+
+def build_chunks(reply: dict, piece: int = 8) -> list:
+    chunks = []
+
+    def chunk(delta, finish_reason=None):
+        chunks.append(SimpleNamespace(
+            choices=[SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason)],
+            x_groq=None
+        ))
+
+    if "tool_call" in reply:
+        name, arguments = reply["tool_call"]
+        encoded = json.dumps(arguments, ensure_ascii=False)
+        half = len(encoded) // 2
+        first = SimpleNamespace(
+            index=0,
+            id=f"call_{uuid.uuid4().hex[:12]}",
+            function=SimpleNamespace(name=name, arguments=encoded[:half])
+        )
+        rest = SimpleNamespace(index=0, id=None, function=SimpleNamespace(name=None, arguments=encoded[half:]))
+        chunk(SimpleNamespace(content=None, tool_calls=[first]))
+        chunk(SimpleNamespace(content=None, tool_calls=[rest]))
+        chunk(SimpleNamespace(content=None, tool_calls=None), "tool_calls")
+        return chunks
+
+    content = reply.get("content") or ""
+    for start in range(0, len(content), piece):
+        chunk(SimpleNamespace(content=content[start:start + piece], tool_calls=None))
+    chunk(SimpleNamespace(content=None, tool_calls=None), "stop")
+    return chunks
+
+
+class _Completions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, tools=None, stream=False, **kwargs):
+        self.owner.calls += 1
+        if self.owner.latency:
+            time.sleep(self.owner.latency)
+        reply = scripted_reply(messages, tools)
+        return iter(build_chunks(reply)) if stream else build_response(reply)
+
+
+class StubGroq:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def close(self):
+        pass
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, model, messages, tools=None, stream=False, **kwargs):
+        self.owner.calls += 1
+        if self.owner.latency:
+            await asyncio.sleep(self.owner.latency)
+        reply = scripted_reply(messages, tools)
+        if not stream:
+            return build_response(reply)
+
+        async def chunks():
+            for item in build_chunks(reply):
+                yield item
+        return chunks()
+
+
+class AsyncStubGroq(StubGroq):
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.chat = SimpleNamespace(completions=_AsyncCompletions(self))
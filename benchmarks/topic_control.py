@@ -0,0 +1,44 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EXAM_STORAGE", "none")
+os.environ.setdefault("GROQ_RPM", "1000000")
+os.environ.setdefault("GROQ_TPM", "1000000000")
+
+from benchmarks.bank_savings import run_exams  # noqa: E402
+from benchmarks.stub_groq import StubGroq  # noqa: E402
+from question_bank import QUESTION_BANK_PATH, QuestionBank  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Виклики LLM на іспит: теми перемикає модель чи сервер")
+    parser.add_argument("--exams", type=int, default=200)
+    parser.add_argument("--bank", action="store_true", help="видавати перші запитання тем з банку")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        import groq_pool
+
+    stub = StubGroq()
+    groq_pool.CLIENT_POOL.factory = lambda api_key: stub
+    app.QUESTION_BANK = QuestionBank(QUESTION_BANK_PATH) if args.bank else None
+
+    rows = {}
+    for control in ("model", "server"):
+        app.TOPIC_CONTROL = control
+        rows[control] = run_exams(app, stub, args.exams, control)
+        row = rows[control]
+        print(f"{control:>7}: іспитів {row['exams']}, ходів {row['turns'] / row['exams']:.1f} на іспит, "
+              f"викликів LLM {row['calls_per_exam']:.2f} на іспит")
+
+    saved = rows["model"]["calls_per_exam"] - rows["server"]["calls_per_exam"]
+    print(f"Заощаджено: {saved:.2f} викликів на іспит ({saved / rows['model']['calls_per_exam']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+CACHE_ENABLED = os.getenv("EXAM_COMPLETION_CACHE", "0") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("EXAM_COMPLETION_CACHE_SIZE", "2048"))
+CACHE_TTL = float(os.getenv("EXAM_COMPLETION_CACHE_TTL", str(24 * 60 * 60)))
+CACHE_DISK_PATH = os.getenv("EXAM_COMPLETION_CACHE_DISK", "")
+LOW_TEMPERATURE = float(os.getenv("EXAM_COMPLETION_CACHE_MAX_TEMPERATURE", "0.2"))
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text or "").split()).casefold()
+
+
+def _message_fields(message) -> dict:
+    if isinstance(message, dict):
+        return {"role": message.get("role"), "content": _normalize(message.get("content"))}
+    return {"role": getattr(message, "role", None), "content": _normalize(getattr(message, "content", None))}
+
+
+def cache_key(model: str, messages: list, tools: Optional[list], temperature: float) -> str:
+    payload = json.dumps({
+        "model": model,
+        "messages": [_message_fields(m) for m in messages],
+        "tools": sorted(t["function"]["name"] for t in (tools or [])),
+        "temperature": round(float(temperature), 2),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def key_messages(step: str, params: dict) -> Optional[list]:
+    messages = params["messages"]
+    if step == "greeting" and sum(1 for m in messages if _message_fields(m)["role"] == "user") == 1:
+        return [messages[0], messages[-1]]
+    if step == "transition" and _message_fields(messages[-1])["role"] == "tool":
+        return [messages[0], messages[-1]]
+    if params.get("temperature", 1.0) <= LOW_TEMPERATURE:
+        return messages
+    return None
+
+
+class _DiskTier:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, reply TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reply FROM completions WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, reply: dict, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, reply, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(reply, ensure_ascii=False), time.time() + ttl)
+            )
+
+
+class CompletionCache:
+    def __init__(
+            self,
+            enabled: bool = CACHE_ENABLED,
+            max_entries: int = CACHE_MAX_ENTRIES,
+            ttl: float = CACHE_TTL,
+            disk_path: str = CACHE_DISK_PATH
+    ):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if enabled and disk_path else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.stores = 0
+
+    def _key(self, step: dict) -> Optional[str]:
+        if not self.enabled:
+            return None
+        params = step["params"]
+        prefix = key_messages(step["step"], params)
+        if prefix is None:
+            return None
+        return cache_key(params["model"], prefix, params.get("tools"), params.get("temperature", 1.0))
+
+    def lookup(self, step: dict) -> Optional[dict]:
+        key = self._key(step)
+        if key is None:
+            if self.enabled:
+                self.skipped += 1
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, reply = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return reply
+                del self._memory[key]
+
+        reply = self._disk.get(key) if self._disk else None
+        if reply is not None:
+            self.disk_hits += 1
+            self._remember(key, reply)
+            return reply
+
+        self.misses += 1
+        return None
+
+    def store(self, step: dict, reply: dict):
+        if reply["tool_calls"] or not reply["content"]:
+            return
+        key = self._key(step)
+        if key is None:
+            return
+        self.stores += 1
+        self._remember(key, reply)
+        if self._disk:
+            self._disk.put(key, reply, self.ttl)
+
+    def _remember(self, key: str, reply: dict):
+        with self._lock:
+            self._memory[key] = (time.monotonic() + self.ttl, reply)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "stores": self.stores,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+COMPLETION_CACHE = CompletionCache()
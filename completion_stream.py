@@ -0,0 +1,122 @@
+import inspect
+from typing import Dict, List, Optional
+
+
+QUESTION_END = "?\n"
+
+
+def _usage_dict(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+
+class ReplyAssembler:
+    def __init__(self):
+        self._content: List[str] = []
+        self._tool_calls: Dict[int, dict] = {}
+        self.finish_reason: Optional[str] = None
+        self.usage: Optional[Dict[str, int]] = None
+
+    @property
+    def content(self) -> str:
+        return "".join(self._content)
+
+    def feed(self, chunk) -> str:
+        x_groq = getattr(chunk, "x_groq", None)
+        usage = getattr(x_groq, "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = _usage_dict(usage)
+
+        if not chunk.choices:
+            return ""
+
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+
+        delta = choice.delta
+        for fragment in getattr(delta, "tool_calls", None) or []:
+            call = self._tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": []})
+            if fragment.id:
+                call["id"] = fragment.id
+            function = fragment.function
+            if function is not None:
+                if function.name:
+                    call["name"] += function.name
+                if function.arguments:
+                    call["arguments"].append(function.arguments)
+
+        text = getattr(delta, "content", None) or ""
+        if text:
+            self._content.append(text)
+        return text
+
+    def stop_after_question(self) -> bool:
+        if self._tool_calls:
+            return False
+        content = self.content
+        end = content.find(QUESTION_END)
+        if end < 0:
+            return False
+        self._content = [content[:end + 1]]
+        self.finish_reason = "question"
+        return True
+
+    def reply(self) -> dict:
+        tool_calls = [
+            {
+                "id": call["id"],
+                "type": "function",
+                "function": {"name": call["name"], "arguments": "".join(call["arguments"])}
+            }
+            for _, call in sorted(self._tool_calls.items())
+        ]
+        return {
+            "content": self.content or None,
+            "tool_calls": tool_calls,
+            "finish_reason": self.finish_reason or ("tool_calls" if tool_calls else "stop"),
+            "usage": self.usage,
+        }
+
+
+def close_stream(stream):
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+async def aclose_stream(stream):
+    close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+def reply_from_response(response) -> dict:
+    choice = response.choices[0]
+    tool_calls = [
+        {
+            "id": call.id,
+            "type": "function",
+            "function": {"name": call.function.name, "arguments": call.function.arguments}
+        }
+        for call in (choice.message.tool_calls or [])
+    ]
+    return {
+        "content": choice.message.content,
+        "tool_calls": tool_calls,
+        "finish_reason": choice.finish_reason,
+        "usage": _usage_dict(getattr(response, "usage", None)),
+    }
+
+
+def assistant_message(reply: dict) -> dict:
+    message = {"role": "assistant", "content": reply["content"] or ""}
+    if reply["tool_calls"]:
+        message["tool_calls"] = reply["tool_calls"]
+    return message
@@ -0,0 +1,101 @@
+import math
+import os
+import re
+from functools import lru_cache
+from typing import List
+
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("EXAM_CONTEXT_TOKEN_BUDGET", "3000"))
+SUMMARY_SNIPPET_CHARS = int(os.getenv("EXAM_CONTEXT_SUMMARY_CHARS", "160"))
+MIN_VERBATIM_TURNS = 2
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other_chars = len(text) - ascii_chars
+    pieces = len(_PIECE_RE.findall(text))
+    return max(pieces, math.ceil(ascii_chars / 4 + other_chars / 2.5))
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    total = 0
+    for m in messages:
+        content = m.get("content") if isinstance(m, dict) else getattr(m, "content", None)
+        total += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(content or "")
+    return total
+
+
+def estimate_history_tokens(history: List[List[str]]) -> int:
+    return sum(
+        2 * MESSAGE_OVERHEAD_TOKENS + estimate_tokens(user_msg) + estimate_tokens(assistant_msg or "")
+        for user_msg, assistant_msg in history
+    )
+
+
+def _snippet(text: str) -> str:
+    text = " ".join((text or "").split())
+    if len(text) <= SUMMARY_SNIPPET_CHARS:
+        return text
+    return text[:SUMMARY_SNIPPET_CHARS].rstrip() + "…"
+
+
+def summarize_turns(label: str, turns: List[List[str]]) -> str:
+    lines = [f"{label} (ходів: {len(turns)}):"]
+    for user_msg, assistant_msg in turns:
+        lines.append(f"- Студент: {_snippet(user_msg)}")
+        if assistant_msg:
+            lines.append(f"  Екзаменатор: {_snippet(assistant_msg)}")
+    return "\n".join(lines)
+
+
+class ExamContext:
+    __slots__ = ("start", "summaries")
+
+    def __init__(self):
+        self.start = 0
+        self.summaries: List[str] = []
+
+    def close_segment(self, history: List[List[str]], label: str):
+        turns = history[self.start:]
+        if turns:
+            self.summaries.append(summarize_turns(label, turns))
+        self.start = len(history)
+
+    def build(self, head: list, history: List[List[str]], message: str, tail: list = (),
+              budget: int = CONTEXT_TOKEN_BUDGET) -> list:
+        summaries = list(self.summaries)
+        turns = history[self.start:]
+        last = {"role": "user", "content": message}
+
+        fixed = estimate_messages_tokens(head) + estimate_messages_tokens(list(tail) + [last])
+
+        def size():
+            total = fixed + estimate_history_tokens(turns)
+            if summaries:
+                total += MESSAGE_OVERHEAD_TOKENS + sum(estimate_tokens(s) for s in summaries)
+            return total
+
+        while size() > budget and len(turns) > MIN_VERBATIM_TURNS:
+            turns = turns[1:]
+        while size() > budget and summaries:
+            summaries.pop(0)
+
+        messages = list(head)
+        if summaries:
+            messages.append({
+                "role": "system",
+                "content": "ПІДСУМОК ЗАВЕРШЕНИХ ЕТАПІВ ІСПИТУ:\n\n" + "\n\n".join(summaries)
+            })
+        for user_msg, assistant_msg in turns:
+            messages.append({"role": "user", "content": user_msg})
+            if assistant_msg:
+                messages.append({"role": "assistant", "content": assistant_msg})
+        messages.extend(tail)
+        messages.append(last)
+        return messages
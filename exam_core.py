@@ -0,0 +1,314 @@
+import random
+from datetime import datetime
+from typing import List
+
+from completion_cache import COMPLETION_CACHE
+from exam_record import EXAM_CODEC, NLP_TOPICS, ExamRecord
+from exam_stats import STATS
+from exam_storage import STORAGE
+from groq_pool import CLIENT_POOL
+from instrumentation import METRICS, get_logger
+from state_backend import STATE
+from topic_prefetch import PREFETCHER
+
+
+DEFAULT_STUDENTS = {
+    "test@lpnu.ua": {"name": "Тестовий Студент", "active": True},
+}
+STUDENTS_DB = STATE.map("students")
+
+EXAM_RESULTS = STATS.recent
+CURRENT_EXAMS = STATE.map("exams", codec=EXAM_CODEC)
+
+log = get_logger("exam")
+
+TOOL_CALLS = METRICS.counter("exam_tool_calls_total", "Виклики інструментів екзаменатора")
+METRICS.gauge("exam_active", "Незавершені іспити", source=lambda: len(CURRENT_EXAMS))
+METRICS.add_collector(
+    "exam_storage", lambda: {"batches": STORAGE.batches, "writes": STORAGE.writes} if STORAGE.opened else {}
+)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def draw_topics(email: str) -> List[int]:
+    return random.sample(range(len(NLP_TOPICS)), random.randint(2, 3))
+
+
+def start_exam(email: str, name: str) -> dict:
+    email = normalize_email(email)
+    if email in CURRENT_EXAMS:
+        return {
+            "success": False,
+            "message": f"Іспит уже розпочато для {name}. Завершіть попередній іспит перед стартом нового."
+        }
+
+    student = {"name": name, "active": True}
+    if STUDENTS_DB.put_if_absent(email, student):
+        STORAGE.save_student(email, student)
+
+    student_info = STUDENTS_DB.get(email, student)
+    if not student_info["active"]:
+        return {"success": False, "message": "Ваш акаунт неактивний"}
+
+    exam = ExamRecord.new(name, email, draw_topics(email))
+    selected_topics = list(exam.topics)
+    num_topics = len(selected_topics)
+
+    if not CURRENT_EXAMS.put_if_absent(email, exam):
+        return {
+            "success": False,
+            "message": f"Іспит уже розпочато для {name}. Завершіть попередній іспит перед стартом нового."
+        }
+    STORAGE.save_exam(email, exam.to_dict())
+
+    log.info("Іспит розпочато для %s, тем: %d", email, num_topics)
+
+    return {
+        "success": True,
+        "topics": selected_topics,
+        "student_name": name,
+        "message": f"Іспит успішно розпочато для {name}!\n\nВаші теми:\n" +
+                   "\n".join([f"{i + 1}. {t}" for i, t in enumerate(selected_topics)])
+    }
+
+
+def next_topic(email: str) -> dict:
+    email = normalize_email(email)
+    exam, _ = CURRENT_EXAMS.update(email, ExamRecord.advance)
+    if exam is None:
+        return {
+            "success": False,
+            "message": "Не знайдено активного іспиту"
+        }
+    STORAGE.save_exam(email, exam.to_dict())
+
+    new_index = exam.topic_index
+    topics = exam.topics
+
+    log.info("%s: перейшли на тему %d/%d", email, new_index + 1, len(topics))
+
+    if new_index >= len(topics):
+        return {
+            "success": True,
+            "finished": True,
+            "message": "Всі теми пройдено! Час завершувати іспит."
+        }
+
+    return {
+        "success": True,
+        "finished": False,
+        "current_topic": topics[new_index],
+        "topic_number": new_index + 1,
+        "total_topics": len(topics),
+        "message": f"Переходимо до теми {new_index + 1}/{len(topics)}: {topics[new_index]}"
+    }
+
+
+def end_exam(email: str, score: float, feedback: str) -> dict:
+    email = normalize_email(email)
+    exam_info = CURRENT_EXAMS.pop(email)
+    if exam_info is None:
+        return {
+            "success": False,
+            "message": "Не знайдено активного іспиту для цього email"
+        }
+
+    end_time = datetime.now()
+    duration = (end_time.timestamp() - exam_info.started) / 60
+
+    result = {
+        "email": email,
+        "name": exam_info.name,
+        "score": round(score, 1),
+        "start_time": exam_info.start_time,
+        "end_time": end_time.isoformat(),
+        "duration_minutes": round(duration, 2),
+        "topics": list(exam_info.topics),
+        "feedback": feedback,
+        "answers_count": exam_info.answers
+    }
+
+    STATS.add(result)
+    PREFETCHER.discard(email)
+    STORAGE.save_result(result)
+    STORAGE.drop_exam(email)
+
+    if score >= 9:
+        grade = "Відмінно!"
+    elif score >= 7:
+        grade = "Добре!"
+    elif score >= 5:
+        grade = "Задовільно"
+    else:
+        grade = "Потрібно вчити"
+
+    log.info("Іспит завершено для %s: %s/10 (%s)", email, score, grade)
+
+    return {
+        "success": True,
+        "score": score,
+        "grade": grade,
+        "duration": duration,
+        "feedback": feedback,
+        "message": f"{grade}\n\nВаша оцінка: {score}/10\nТривалість: {duration:.1f} хв"
+    }
+
+
+def abandon_exam(email: str):
+    PREFETCHER.discard(email)
+    if CURRENT_EXAMS.pop(email) is not None:
+        STORAGE.drop_exam(email)
+
+
+def restore_state():
+    for email, student in DEFAULT_STUDENTS.items():
+        STUDENTS_DB.put_if_absent(email, student)
+    for email, student in STORAGE.load_students().items():
+        STUDENTS_DB.put_if_absent(email, student)
+    for result in STORAGE.load_results():
+        STATS.add(result)
+    for email, exam in STORAGE.load_exams().items():
+        CURRENT_EXAMS.put_if_absent(email, ExamRecord.from_dict(exam))
+    if CURRENT_EXAMS or STATS.total.count:
+        log.info("Відновлено: %d результатів, %d незавершених іспитів", STATS.total.count, len(CURRENT_EXAMS))
+
+
+def get_statistics() -> str:
+    try:
+        if not STATS.total.count:
+            return "Ще немає завершених іспитів"
+
+        pool = CLIENT_POOL.stats()
+        cache = COMPLETION_CACHE.stats()
+        return "\n".join([
+            STATS.render(last=5),
+            "=" * 50,
+            "",
+            "GROQ КЛІЄНТИ:",
+            f"Пул: {pool['clients']} (hit {pool['hits']} / miss {pool['misses']})",
+            f"HTTP запитів: {pool['requests']}, нових з'єднань: {pool['connections_opened']}, "
+            f"повторно використано: {pool['connections_reused']}",
+            f"Кеш відповідей: hit {cache['hits'] + cache['disk_hits']} / miss {cache['misses']} "
+            f"({cache['hit_rate']:.0%}), записів {cache['entries']}",
+            "",
+        ])
+
+    except Exception as e:
+        return f"Помилка при обчисленні статистики: {str(e)}"
+
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "start_exam",
+            "description": "Розпочати іспит ТІЛЬКИ коли студент чітко надав ІМ'Я та EMAIL. Викликай ОДИН РАЗ!",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "email": {
+                        "type": "string",
+                        "description": "Email студента: name@lpnu.ua (наприклад test@lpnu.ua)"
+                    },
+                    "name": {
+                        "type": "string",
+                        "description": "Повне ім'я студента (наприклад 'Іван Петренко')"
+                    }
+                },
+                "required": ["email", "name"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "next_topic",
+            "description": "Перейти на НАСТУПНУ тему іспиту. Викликай коли задав 3-4 запитання на поточній темі АБО студент не знає тему.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "email": {
+                        "type": "string",
+                        "description": "Email студента"
+                    }
+                },
+                "required": ["email"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "end_exam",
+            "description": "Завершити іспит ТІЛЬКИ ПІСЛЯ того як next_topic повернув finished=True. Дай справедливу оцінку.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "email": {
+                        "type": "string",
+                        "description": "Email студента"
+                    },
+                    "score": {
+                        "type": "number",
+                        "description": "Оцінка 0-10 (може бути 7.5). Оцінюй справедливо!"
+                    },
+                    "feedback": {
+                        "type": "string",
+                        "description": "Мінімум 3-4 речення: що знає добре, над чим попрацювати"
+                    }
+                },
+                "required": ["email", "score", "feedback"]
+            }
+        }
+    }
+]
+
+
+def execute_function(function_name: str, arguments: dict) -> dict:
+    TOOL_CALLS.inc(function=function_name)
+
+    try:
+        if function_name == "start_exam":
+            result = start_exam(arguments["email"], arguments["name"])
+        elif function_name == "next_topic":
+            result = next_topic(arguments["email"])
+        elif function_name == "end_exam":
+            result = end_exam(
+                arguments["email"],
+                float(arguments["score"]),
+                arguments["feedback"]
+            )
+        else:
+            result = {"success": False, "message": f"Невідома функція: {function_name}"}
+
+        log.debug("%s -> success=%s", function_name, result.get("success"))
+        return result
+
+    except Exception as e:
+        log.warning("Помилка виконання %s: %s", function_name, e)
+        return {"success": False, "message": f"Помилка: {str(e)}"}
+
+
+def get_current_topic(email: str):
+    exam = CURRENT_EXAMS.get(email)
+    return exam.current_topic if exam else None
+
+
+def get_exam_progress(email: str) -> dict:
+    exam = CURRENT_EXAMS.get(email)
+    if not exam:
+        return {"active": False}
+
+    return {
+        "active": True,
+        "current_topic": exam.current_topic,
+        "topic_index": exam.topic_index,
+        "total_topics": exam.total_topics,
+        "questions_on_topic": exam.questions_on_topic,
+        "all_topics_done": exam.all_topics_done,
+        "start_time": exam.start_time
+    }
+
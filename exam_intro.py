@@ -0,0 +1,37 @@
+import re
+from typing import Optional, Tuple
+
+
+EMAIL_RE = re.compile(r"(?<![\w.+-])[\w.+-]+@lpnu\.ua(?![\w-]|\.[\w-])", re.IGNORECASE)
+NAME_WORD = r"[A-ZА-ЯІЇЄҐ][a-zа-яіїєґ'’ʼ]+(?:-[A-ZА-ЯІЇЄҐ][a-zа-яіїєґ'’ʼ]+)?"
+NAME_RE = re.compile(rf"{NAME_WORD}(?:\s+{NAME_WORD}){{1,2}}")
+LEAD_RE = re.compile(r"(?:^|[\s,.!])(?:я|мене звати|моє ім'я|моє ім’я|ім'я|ім’я|name)\s*[:—–-]?\s+", re.IGNORECASE)
+
+NOT_NAMES = {
+    "привіт", "вітаю", "добрий", "доброго", "день", "ранку", "вечора", "здрастуйте", "здравствуйте",
+    "я", "мене", "звати", "моє", "ім'я", "ім’я", "email", "пошта", "студент", "студентка", "група",
+    "hello", "hi",
+}
+
+
+def _name_candidates(text: str):
+    for match in NAME_RE.finditer(text):
+        words = match.group(0).split()
+        while words and words[0].lower() in NOT_NAMES:
+            words.pop(0)
+        if len(words) >= 2 and not any(w.lower() in NOT_NAMES for w in words):
+            yield " ".join(words)
+
+
+def parse_introduction(message: str) -> Optional[Tuple[str, str]]:
+    emails = EMAIL_RE.findall(message or "")
+    if len({e.lower() for e in emails}) != 1:
+        return None
+    email = emails[0].lower()
+    text = EMAIL_RE.sub(" , ", message)
+
+    lead = LEAD_RE.search(text)
+    names = list(dict.fromkeys(_name_candidates(text[lead.end():] if lead else text)))
+    if len(names) != 1:
+        return None
+    return names[0], email
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+
+NLP_TOPICS = (
+    "Tokenization та Word Embeddings",
+    "Transformer Architecture та Self-Attention",
+    "BERT та Masked Language Modeling",
+    "GPT моделі та Autoregressive Generation",
+    "Fine-tuning та Transfer Learning",
+    "Named Entity Recognition (NER)",
+    "Machine Translation та Seq2Seq",
+    "Text Classification та Sentiment Analysis",
+    "Question Answering Systems",
+    "Prompt Engineering та Few-Shot Learning",
+)
+TOPIC_IDS = {topic: i for i, topic in enumerate(NLP_TOPICS)}
+
+
+class ExamRecord:
+    __slots__ = ("name", "email", "started", "topic_ids", "topic_index", "questions_on_topic", "answers")
+
+    def __init__(self, name: str, email: str, started: float, topic_ids: bytes,
+                 topic_index: int = 0, questions_on_topic: int = 0, answers: int = 0):
+        self.name = name
+        self.email = email
+        self.started = started
+        self.topic_ids = topic_ids
+        self.topic_index = topic_index
+        self.questions_on_topic = questions_on_topic
+        self.answers = answers
+
+    @classmethod
+    def new(cls, name: str, email: str, topic_ids: Sequence[int]) -> "ExamRecord":
+        return cls(name, email, time.time(), bytes(topic_ids))
+
+    @property
+    def topics(self) -> Tuple[str, ...]:
+        return tuple(NLP_TOPICS[i] for i in self.topic_ids)
+
+    @property
+    def total_topics(self) -> int:
+        return len(self.topic_ids)
+
+    @property
+    def all_topics_done(self) -> bool:
+        return self.topic_index >= len(self.topic_ids)
+
+    @property
+    def current_topic(self) -> Optional[str]:
+        return None if self.all_topics_done else NLP_TOPICS[self.topic_ids[self.topic_index]]
+
+    def topic(self, index: int) -> str:
+        return NLP_TOPICS[self.topic_ids[index]]
+
+    @property
+    def start_time(self) -> str:
+        return datetime.fromtimestamp(self.started).isoformat()
+
+    def advance(self):
+        self.topic_index += 1
+        self.questions_on_topic = 0
+
+    def count_question(self):
+        if not self.all_topics_done:
+            self.questions_on_topic += 1
+            self.answers += 1
+
+    def __deepcopy__(self, memo):
+        return ExamRecord(self.name, self.email, self.started, self.topic_ids,
+                          self.topic_index, self.questions_on_topic, self.answers)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "email": self.email,
+            "started": self.started,
+            "topics": list(self.topic_ids),
+            "topic_index": self.topic_index,
+            "questions_on_topic": self.questions_on_topic,
+            "answers": self.answers
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExamRecord":
+        if "started" in data:
+            return cls(data["name"], data["email"], data["started"], bytes(data["topics"]),
+                       data["topic_index"], data["questions_on_topic"], data.get("answers", 0))
+        return cls(
+            data["name"], data["email"],
+            datetime.fromisoformat(data["start_time"]).timestamp(),
+            bytes(TOPIC_IDS[topic] for topic in data["topics"]),
+            data.get("current_topic_index", 0), data.get("questions_on_topic", 0),
+            len(data.get("answers", []))
+        )
+
+
+EXAM_CODEC = (ExamRecord.to_dict, ExamRecord.from_dict)
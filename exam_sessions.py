@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from exam_context import ExamContext
+from exam_transcript import Transcript
+from instrumentation import get_logger
+from prompt_bundles import PrefixTracker
+from state_backend import STATE
+
+
+SESSION_IDLE_TIMEOUT = 6 * 60 * 60
+SWEEP_EVERY = 256
+
+log = get_logger("sessions")
+
+
+class ExamSession:
+    __slots__ = ("session_id", "email", "lock", "async_lock", "context", "prefix", "transcript", "recording",
+                 "completions", "last_seen")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.email: Optional[str] = None
+        self.lock = threading.Lock()
+        self.async_lock = asyncio.Lock()
+        self.context = ExamContext()
+        self.prefix = PrefixTracker()
+        self.transcript = Transcript()
+        self.recording = None
+        self.completions = 0
+        self.last_seen = time.monotonic()
+
+
+class SessionStore:
+    def __init__(self, shards: int = 64, owners=None):
+        self._sessions: Dict[str, ExamSession] = {}
+        self._owners = owners if owners is not None else STATE.map("owners", ttl=SESSION_IDLE_TIMEOUT, indexed=False)
+        self._shard_locks = [threading.Lock() for _ in range(shards)]
+        self._created = 0
+
+    def _shard(self, session_id: str) -> threading.Lock:
+        return self._shard_locks[hash(session_id) % len(self._shard_locks)]
+
+    def get(self, session_id: Optional[str]) -> ExamSession:
+        if not session_id:
+            session_id = new_session_id()
+            log.warning("Виклик без session_id: створено нову сесію %s, прив'язку до іспиту між викликами не збережено",
+                        session_id)
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            with self._shard(session_id):
+                session = self._sessions.get(session_id)
+                if session is None:
+                    session = ExamSession(session_id)
+                    self._sessions[session_id] = session
+                    self._created += 1
+            if self._created % SWEEP_EVERY == 0:
+                self.sweep()
+
+        session.last_seen = time.monotonic()
+        return session
+
+    def bind(self, session_id: str, email: str):
+        self.get(session_id).email = email
+        self._owners.put(email, session_id)
+
+    def owner_of(self, email: str) -> Optional[str]:
+        return self._owners.get(email)
+
+    def email_for(self, session_id: str) -> Optional[str]:
+        session = self._sessions.get(session_id)
+        return session.email if session else None
+
+    def release(self, session_id: str) -> Optional[str]:
+        with self._shard(session_id):
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+        if session.email:
+            self._owners.pop_if(session.email, session_id)
+        return session.email
+
+    def sweep(self, max_idle: float = SESSION_IDLE_TIMEOUT) -> int:
+        now = time.monotonic()
+        stale = [sid for sid, s in list(self._sessions.items()) if now - s.last_seen > max_idle]
+        for sid in stale:
+            self.release(sid)
+        return len(stale)
+
+    def transcript_bytes(self) -> int:
+        return sum(session.transcript.nbytes() for session in list(self._sessions.values()))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+SESSIONS = SessionStore()
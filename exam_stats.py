@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+
+RECENT_RESULTS = int(os.getenv("EXAM_STATS_RECENT", "100"))
+WINDOW_HOURS = 7 * 24
+SCORE_BANDS = (("9-10", 9), ("7-8", 7), ("5-6", 5), ("0-4", 0))
+
+TIME_WINDOWS = (
+    ("Остання година", 1),
+    ("Останні 24 години", 24),
+    ("Останні 7 днів", WINDOW_HOURS),
+)
+
+
+def _band(score: float) -> int:
+    for i, (_, low) in enumerate(SCORE_BANDS):
+        if score >= low:
+            return i
+    return len(SCORE_BANDS) - 1
+
+
+class _Aggregate:
+    __slots__ = ("count", "score_sum", "score_min", "score_max", "duration_sum", "bands")
+
+    def __init__(self):
+        self.count = 0
+        self.score_sum = 0.0
+        self.score_min = None
+        self.score_max = None
+        self.duration_sum = 0.0
+        self.bands = [0] * len(SCORE_BANDS)
+
+    def add(self, score: float, duration: float):
+        self.count += 1
+        self.score_sum += score
+        self.score_min = score if self.score_min is None else min(self.score_min, score)
+        self.score_max = score if self.score_max is None else max(self.score_max, score)
+        self.duration_sum += duration
+        self.bands[_band(score)] += 1
+
+    @property
+    def average(self) -> float:
+        return self.score_sum / self.count if self.count else 0.0
+
+
+class ExamStatistics:
+    def __init__(self, recent: int = RECENT_RESULTS):
+        self.total = _Aggregate()
+        self.topics: Dict[str, _Aggregate] = {}
+        self.recent = deque(maxlen=recent)
+        self.hours = deque(maxlen=WINDOW_HOURS)
+        self._lock = threading.Lock()
+
+    def add(self, result: dict):
+        score = float(result["score"])
+        duration = float(result.get("duration_minutes", 0.0))
+        try:
+            hour = int(datetime.fromisoformat(result["end_time"]).timestamp() // 3600)
+        except (KeyError, ValueError):
+            hour = int(time.time() // 3600)
+
+        with self._lock:
+            self.total.add(score, duration)
+            for topic in result.get("topics", []):
+                self.topics.setdefault(topic, _Aggregate()).add(score, duration)
+            self.recent.append(result)
+
+            if self.hours and self.hours[-1][0] == hour:
+                bucket = self.hours[-1]
+            elif self.hours and self.hours[-1][0] > hour:
+                bucket = next((b for b in reversed(self.hours) if b[0] == hour), None)
+            else:
+                bucket = [hour, _Aggregate()]
+                self.hours.append(bucket)
+            if bucket is not None:
+                bucket[1].add(score, duration)
+
+    def window(self, hours: int, now: float = None) -> _Aggregate:
+        current = int((now or time.time()) // 3600)
+        merged = _Aggregate()
+        with self._lock:
+            for hour, agg in reversed(self.hours):
+                if hour <= current - hours:
+                    break
+                merged.count += agg.count
+                merged.score_sum += agg.score_sum
+                merged.duration_sum += agg.duration_sum
+                for i, n in enumerate(agg.bands):
+                    merged.bands[i] += n
+        return merged
+
+    def render(self, last: int = 5) -> str:
+        if not self.total.count:
+            return "Ще немає завершених іспитів"
+
+        with self._lock:
+            total = self.total
+            recent = list(self.recent)[-last:]
+            topics = sorted(self.topics.items(), key=lambda item: -item[1].count)
+
+        lines: List[str] = [
+            "СТАТИСТИКА ІСПИТІВ",
+            "=" * 50,
+            "",
+            "ЗАГАЛЬНІ ПОКАЗНИКИ:",
+            f"Всього проведено іспитів: {total.count}",
+            f"Середня оцінка: {total.average:.2f}/10",
+            f"Найвища оцінка: {total.score_max}/10",
+            f"Найнижча оцінка: {total.score_min}/10",
+            f"Загальний час: {total.duration_sum:.1f} хвилин",
+            "",
+            "=" * 50,
+            "",
+            "ЗА ПЕРІОДАМИ:",
+        ]
+        for label, hours in TIME_WINDOWS:
+            agg = self.window(hours)
+            lines.append(f"{label}: {agg.count} іспитів, середня {agg.average:.2f}/10")
+
+        lines += ["", "=" * 50, "", "ЗА ТЕМАМИ:"]
+        band_names = " / ".join(name for name, _ in SCORE_BANDS)
+        for topic, agg in topics:
+            bands = " / ".join(str(n) for n in agg.bands)
+            lines.append(f"{topic}: {agg.count} іспитів, середня {agg.average:.2f}/10 ({band_names}: {bands})")
+
+        lines += ["", "=" * 50, "", f"ОСТАННІ {last} СТУДЕНТІВ:", ""]
+        for i, r in enumerate(recent, 1):
+            topic_list = ", ".join(r["topics"][:2])
+            if len(r["topics"]) > 2:
+                topic_list += ", ..."
+            lines += [
+                f"{i}. {r['name']}",
+                f"   Оцінка: {r['score']}/10",
+                f"   Час: {r['duration_minutes']:.1f} хв",
+                f"   Теми: {topic_list}",
+                "",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+STATS = ExamStatistics()
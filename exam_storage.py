@@ -0,0 +1,398 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from instrumentation import get_logger, span
+
+
+STORAGE_URL = os.getenv("EXAM_STORAGE", "sqlite:exam_data.sqlite3")
+BATCH_SIZE = int(os.getenv("EXAM_STORAGE_BATCH_SIZE", "256"))
+BATCH_WINDOW = float(os.getenv("EXAM_STORAGE_BATCH_WINDOW", "0.05"))
+
+Op = Tuple[str, str, Optional[dict]]
+
+log = get_logger("storage")
+
+
+def result_matches(result: dict, since: Optional[str] = None, until: Optional[str] = None, topic: Optional[str] = None,
+                   min_score: Optional[float] = None, max_score: Optional[float] = None) -> bool:
+    end_time = result.get("end_time", "")
+    if since and end_time < since:
+        return False
+    if until and end_time >= until:
+        return False
+    if topic and topic not in result.get("topics", ()):
+        return False
+    score = float(result.get("score", 0))
+    if min_score is not None and score < min_score:
+        return False
+    if max_score is not None and score > max_score:
+        return False
+    return True
+
+
+class ExamStorage(ABC):
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Op]]" = queue.Queue()
+        self._pending = 0
+        self._drained = threading.Condition()
+        self._closed = False
+        self.batches = 0
+        self.writes = 0
+        self._thread = threading.Thread(target=self._run, name="exam-storage-writer", daemon=True)
+        self._thread.start()
+
+    def save_result(self, result: dict):
+        self._put(("result", result["email"], result))
+
+    def save_student(self, email: str, record: dict):
+        self._put(("student", email, dict(record)))
+
+    def save_exam(self, email: str, exam: dict):
+        self._put(("exam", email, json.loads(json.dumps(exam, ensure_ascii=False))))
+
+    def drop_exam(self, email: str):
+        self._put(("drop_exam", email, None))
+
+    def save_transcript(self, email: str, start_time: str, turns: List[List[str]]):
+        self._put(("transcript", email, {"start_time": start_time, "turns": [list(t) for t in turns]}))
+
+    def _put(self, op: Op):
+        if self._closed:
+            raise RuntimeError("Сховище результатів закрито")
+        with self._drained:
+            self._pending += 1
+        self._queue.put(op)
+
+    def _run(self):
+        while True:
+            op = self._queue.get()
+            if op is None:
+                return
+            batch: List[Op] = [op]
+            deadline = time.monotonic() + BATCH_WINDOW
+            stop = False
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    op = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if op is None:
+                    stop = True
+                    break
+                batch.append(op)
+
+            try:
+                with span("storage_write_batch"):
+                    self._write_batch(batch)
+                self.batches += 1
+                self.writes += len(batch)
+            except Exception as e:
+                log.error("Помилка запису в сховище (%d операцій): %s", len(batch), e)
+
+            with self._drained:
+                self._pending -= len(batch)
+                if self._pending == 0:
+                    self._drained.notify_all()
+            if stop:
+                return
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        with self._drained:
+            return self._drained.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10.0)
+        self._close_backend()
+
+    @abstractmethod
+    def _write_batch(self, batch: List[Op]):
+        ...
+
+    def _close_backend(self):
+        pass
+
+    @abstractmethod
+    def load_results(self) -> Iterator[dict]:
+        ...
+
+    def iter_results(self, after: int = 0, **filters) -> Iterator[Tuple[int, dict]]:
+        for result_id, result in enumerate(self.load_results(), 1):
+            if result_id > after and result_matches(result, **filters):
+                yield result_id, result
+
+    @abstractmethod
+    def load_students(self) -> Dict[str, dict]:
+        ...
+
+    @abstractmethod
+    def load_exams(self) -> Dict[str, dict]:
+        ...
+
+    @abstractmethod
+    def load_transcripts(self) -> Iterator[dict]:
+        ...
+
+
+class NullStorage(ExamStorage):
+    def _write_batch(self, batch: List[Op]):
+        pass
+
+    def load_results(self) -> Iterator[dict]:
+        return iter(())
+
+    def load_students(self) -> Dict[str, dict]:
+        return {}
+
+    def load_exams(self) -> Dict[str, dict]:
+        return {}
+
+    def load_transcripts(self) -> Iterator[dict]:
+        return iter(())
+
+
+class SQLiteStorage(ExamStorage):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS results_end_time ON results (end_time);
+        CREATE TABLE IF NOT EXISTS students (
+            email TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS exams (
+            email TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transcripts (
+            email TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (email, start_time)
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = self._connect()
+        self._conn.executescript(self.SCHEMA)
+        super().__init__()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_batch(self, batch: List[Op]):
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            for kind, email, data in batch:
+                if kind == "result":
+                    conn.execute(
+                        "INSERT INTO results (email, end_time, data) VALUES (?, ?, ?)",
+                        (email, data["end_time"], json.dumps(data, ensure_ascii=False))
+                    )
+                elif kind == "student":
+                    conn.execute(
+                        "INSERT OR REPLACE INTO students (email, data) VALUES (?, ?)",
+                        (email, json.dumps(data, ensure_ascii=False))
+                    )
+                elif kind == "exam":
+                    conn.execute(
+                        "INSERT OR REPLACE INTO exams (email, data, updated_at) VALUES (?, ?, ?)",
+                        (email, json.dumps(data, ensure_ascii=False), now)
+                    )
+                elif kind == "drop_exam":
+                    conn.execute("DELETE FROM exams WHERE email = ?", (email,))
+                elif kind == "transcript":
+                    conn.execute(
+                        "INSERT OR REPLACE INTO transcripts (email, start_time, data) VALUES (?, ?, ?)",
+                        (email, data["start_time"], json.dumps(data["turns"], ensure_ascii=False))
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _close_backend(self):
+        self._conn.close()
+
+    def _read(self, sql: str, params: tuple = ()) -> Iterator[tuple]:
+        conn = self._connect()
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+    def load_results(self) -> Iterator[dict]:
+        for (data,) in self._read("SELECT data FROM results ORDER BY id"):
+            yield json.loads(data)
+
+    def iter_results(self, after: int = 0, since: Optional[str] = None, until: Optional[str] = None,
+                     topic: Optional[str] = None, min_score: Optional[float] = None,
+                     max_score: Optional[float] = None) -> Iterator[Tuple[int, dict]]:
+        clauses, params = ["id > ?"], [after]
+        if since:
+            clauses.append("end_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("end_time < ?")
+            params.append(until)
+        if min_score is not None:
+            clauses.append("json_extract(data, '$.score') >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("json_extract(data, '$.score') <= ?")
+            params.append(max_score)
+        if topic:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(data, '$.topics') WHERE value = ?)")
+            params.append(topic)
+        sql = f"SELECT id, data FROM results WHERE {' AND '.join(clauses)} ORDER BY id"
+        for result_id, data in self._read(sql, tuple(params)):
+            yield result_id, json.loads(data)
+
+    def load_students(self) -> Dict[str, dict]:
+        return {email: json.loads(data) for email, data in self._read("SELECT email, data FROM students")}
+
+    def load_exams(self) -> Dict[str, dict]:
+        return {email: json.loads(data) for email, data in self._read("SELECT email, data FROM exams")}
+
+    def load_transcripts(self) -> Iterator[dict]:
+        for email, start_time, data in self._read("SELECT email, start_time, data FROM transcripts"):
+            yield {"email": email, "start_time": start_time, "turns": json.loads(data)}
+
+
+class JsonlStorage(ExamStorage):
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.results_path = os.path.join(directory, "results.jsonl")
+        self.state_path = os.path.join(directory, "state.jsonl")
+        self.transcripts_path = os.path.join(directory, "transcripts.jsonl")
+        self._results = open(self.results_path, "a", encoding="utf-8")
+        self._state = open(self.state_path, "a", encoding="utf-8")
+        self._transcripts = open(self.transcripts_path, "a", encoding="utf-8")
+        super().__init__()
+
+    def _write_batch(self, batch: List[Op]):
+        results, state, transcripts = [], [], []
+        for kind, email, data in batch:
+            line = json.dumps({"op": kind, "email": email, "data": data}, ensure_ascii=False) + "\n"
+            if kind == "result":
+                results.append(line)
+            elif kind == "transcript":
+                transcripts.append(line)
+            else:
+                state.append(line)
+
+        for handle, lines in ((self._results, results), (self._state, state), (self._transcripts, transcripts)):
+            if lines:
+                handle.write("".join(lines))
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def _close_backend(self):
+        self._results.close()
+        self._state.close()
+        self._transcripts.close()
+
+    @staticmethod
+    def _replay(path: str) -> Iterator[dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def load_results(self) -> Iterator[dict]:
+        for entry in self._replay(self.results_path):
+            yield entry["data"]
+
+    def _load_state(self, kind: str) -> Dict[str, dict]:
+        state = {}
+        for entry in self._replay(self.state_path):
+            if entry["op"] == kind:
+                state[entry["email"]] = entry["data"]
+            elif kind == "exam" and entry["op"] == "drop_exam":
+                state.pop(entry["email"], None)
+        return state
+
+    def load_students(self) -> Dict[str, dict]:
+        return self._load_state("student")
+
+    def load_exams(self) -> Dict[str, dict]:
+        return self._load_state("exam")
+
+    def load_transcripts(self) -> Iterator[dict]:
+        latest = {}
+        for entry in self._replay(self.transcripts_path):
+            latest[(entry["email"], entry["data"]["start_time"])] = entry["data"]["turns"]
+        for (email, start_time), turns in latest.items():
+            yield {"email": email, "start_time": start_time, "turns": turns}
+
+
+def open_storage(url: str = STORAGE_URL) -> ExamStorage:
+    kind, _, target = url.partition(":")
+    if kind == "sqlite":
+        return SQLiteStorage(target or "exam_data.sqlite3")
+    if kind == "jsonl":
+        return JsonlStorage(target or "exam_data")
+    if kind in ("none", "memory", ""):
+        return NullStorage()
+    raise ValueError(f"Невідомий тип сховища: {url}")
+
+
+class LazyStorage:
+    def __init__(self, url: str = STORAGE_URL):
+        self.url = url
+        self._storage: Optional[ExamStorage] = None
+        self._lock = threading.Lock()
+
+    @property
+    def opened(self) -> bool:
+        return self._storage is not None
+
+    def _open(self) -> ExamStorage:
+        if self._storage is None:
+            with self._lock:
+                if self._storage is None:
+                    self._storage = open_storage(self.url)
+        return self._storage
+
+    def __getattr__(self, name: str):
+        return getattr(self._open(), name)
+
+    def close(self):
+        if self._storage is not None:
+            self._storage.close()
+
+
+STORAGE = LazyStorage()
+atexit.register(STORAGE.close)
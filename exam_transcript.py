@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+import zlib
+from typing import Iterable, Iterator, List, Tuple
+
+
+BLOCK_TURNS = int(os.getenv("EXAM_TRANSCRIPT_BLOCK_TURNS", "8"))
+
+Turn = Tuple[str, str]
+
+
+def _pack(turns: List[Turn]) -> bytes:
+    return zlib.compress(json.dumps(turns, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(block: bytes) -> List[list]:
+    return json.loads(zlib.decompress(block))
+
+
+class Transcript:
+    __slots__ = ("_blocks", "_tail", "_block_turns")
+
+    def __init__(self, turns: Iterable = (), block_turns: int = BLOCK_TURNS):
+        self._blocks: List[bytes] = []
+        self._tail: List[Turn] = []
+        self._block_turns = block_turns
+        self.extend(turns)
+
+    def append(self, turn):
+        user_msg, assistant_msg = turn
+        self._tail.append((user_msg, assistant_msg))
+        if len(self._tail) >= self._block_turns:
+            self._blocks.append(_pack(self._tail))
+            self._tail = []
+
+    def extend(self, turns: Iterable):
+        for turn in turns:
+            self.append(turn)
+
+    def __len__(self) -> int:
+        return len(self._blocks) * self._block_turns + len(self._tail)
+
+    def _rows(self, start: int, stop: int) -> List[list]:
+        rows = []
+        sealed = len(self._blocks) * self._block_turns
+        for block in range(start // self._block_turns, min(stop, sealed) // self._block_turns + 1):
+            if block >= len(self._blocks):
+                break
+            offset = block * self._block_turns
+            for i, row in enumerate(_unpack(self._blocks[block])):
+                if start <= offset + i < stop:
+                    rows.append(row)
+        rows.extend([u, a] for u, a in self._tail[max(start - sealed, 0):max(stop - sealed, 0)])
+        return rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            rows = self._rows(start, stop) if start < stop else []
+            return rows if step == 1 else self.rows()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return self._rows(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[list]:
+        for block in self._blocks:
+            yield from _unpack(block)
+        for user_msg, assistant_msg in self._tail:
+            yield [user_msg, assistant_msg]
+
+    def __add__(self, other) -> List[list]:
+        return self.rows() + list(other)
+
+    def rows(self) -> List[list]:
+        return list(self)
+
+    def nbytes(self) -> int:
+        return (sum(sys.getsizeof(block) for block in self._blocks)
+                + sum(sys.getsizeof(u) + sys.getsizeof(a or "") for u, a in self._tail))
@@ -0,0 +1,236 @@
+import asyncio
+import atexit
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from instrumentation import get_logger
+
+
+POOL_MAX_CLIENTS = int(os.getenv("GROQ_POOL_MAX_CLIENTS", os.getenv("EXAM_CONCURRENCY_LIMIT", "200")))
+POOL_IDLE_TIMEOUT = float(os.getenv("GROQ_POOL_IDLE_TIMEOUT", "600"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("GROQ_HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("GROQ_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_HTTP_KEEPALIVE_EXPIRY", "120"))
+HTTP_TIMEOUT = float(os.getenv("GROQ_HTTP_TIMEOUT", "60"))
+
+log = get_logger("groq_pool")
+
+
+def _http_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+class _PooledClient:
+    __slots__ = ("client", "http_client", "last_used", "leases", "requests", "connections")
+
+    def __init__(self, client, http_client):
+        self.client = client
+        self.http_client = http_client
+        self.last_used = time.monotonic()
+        self.leases = 0
+        self.requests = 0
+        self.connections = 0
+
+    def close(self):
+        closer = self.http_client if self.http_client is not None else self.client
+        if inspect.iscoroutinefunction(getattr(closer, "aclose", None)):
+            try:
+                asyncio.get_running_loop().create_task(closer.aclose())
+            except RuntimeError:
+                asyncio.run(closer.aclose())
+        elif hasattr(closer, "close"):
+            closer.close()
+
+
+class _Lease:
+    __slots__ = ("pool", "key", "entry")
+
+    def __init__(self, pool: "GroqClientPool", key: Tuple[str, str]):
+        self.pool = pool
+        self.key = key
+        self.entry: Optional[_PooledClient] = None
+
+    def __enter__(self):
+        self.entry = self.pool._acquire(self.key)
+        return self.entry.client
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool._release(self.key, self.entry)
+        return False
+
+
+class GroqClientPool:
+    def __init__(
+            self,
+            max_clients: int = POOL_MAX_CLIENTS,
+            idle_timeout: float = POOL_IDLE_TIMEOUT,
+            factory: Optional[Callable[[str], object]] = None,
+            async_factory: Optional[Callable[[str], object]] = None
+    ):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+        self.async_factory = async_factory
+        self._clients: "OrderedDict[Tuple[str, str], _PooledClient]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._retired_requests = 0
+        self._retired_connections = 0
+
+    def _build(self, api_key: str) -> _PooledClient:
+        if self.factory is not None:
+            return _PooledClient(self.factory(api_key), None)
+
+        import httpx
+        from groq import Groq
+
+        entry = _PooledClient(None, None)
+
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                entry.connections += 1
+
+        def on_request(request):
+            entry.requests += 1
+            request.extensions["trace"] = trace
+
+        entry.http_client = httpx.Client(
+            limits=_http_limits(),
+            timeout=HTTP_TIMEOUT,
+            event_hooks={"request": [on_request]}
+        )
+        entry.client = Groq(api_key=api_key, http_client=entry.http_client, max_retries=0)
+        return entry
+
+    def _build_async(self, api_key: str) -> _PooledClient:
+        if self.async_factory is not None:
+            return _PooledClient(self.async_factory(api_key), None)
+
+        import httpx
+        from groq import AsyncGroq
+
+        entry = _PooledClient(None, None)
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                entry.connections += 1
+
+        async def on_request(request):
+            entry.requests += 1
+            request.extensions["trace"] = trace
+
+        entry.http_client = httpx.AsyncClient(
+            limits=_http_limits(),
+            timeout=HTTP_TIMEOUT,
+            event_hooks={"request": [on_request]}
+        )
+        entry.client = AsyncGroq(api_key=api_key, http_client=entry.http_client, max_retries=0)
+        return entry
+
+    def _retire(self, entry: _PooledClient):
+        self._retired_requests += entry.requests
+        self._retired_connections += entry.connections
+        try:
+            entry.close()
+        except Exception as e:
+            log.warning("Помилка закриття Groq клієнта: %s", e)
+
+    def _evict_locked(self, key: Tuple[str, str], entry: _PooledClient):
+        del self._clients[key]
+        self.evictions += 1
+        self._retire(entry)
+
+    def _evict_idle_locked(self, now: float):
+        for key, entry in list(self._clients.items()):
+            if entry.leases:
+                continue
+            if now - entry.last_used < self.idle_timeout:
+                break
+            self._evict_locked(key, entry)
+
+    def _evict_overflow_locked(self):
+        for key, entry in list(self._clients.items()):
+            if len(self._clients) <= self.max_clients:
+                break
+            if not entry.leases:
+                self._evict_locked(key, entry)
+
+    def lease(self, api_key: str, asynchronous: bool = False) -> "_Lease":
+        return _Lease(self, ("async", api_key) if asynchronous else ("sync", api_key))
+
+    def _acquire(self, key: Tuple[str, str]) -> _PooledClient:
+        if self._closed:
+            raise RuntimeError("Пул Groq клієнтів закрито")
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle_locked(now)
+
+            entry = self._clients.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._clients.move_to_end(key)
+            else:
+                self.misses += 1
+                entry = (self._build_async if key[0] == "async" else self._build)(key[1])
+                self._clients[key] = entry
+
+            entry.leases += 1
+            entry.last_used = now
+            self._evict_overflow_locked()
+            return entry
+
+    def _release(self, key: Tuple[str, str], entry: _PooledClient):
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            if self._clients.get(key) is entry:
+                self._clients.move_to_end(key)
+                self._evict_overflow_locked()
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            while self._clients:
+                _, entry = self._clients.popitem(last=False)
+                self._retire(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            requests = self._retired_requests + sum(e.requests for e in self._clients.values())
+            connections = self._retired_connections + sum(e.connections for e in self._clients.values())
+            return {
+                "clients": len(self._clients),
+                "leased": sum(1 for e in self._clients.values() if e.leases),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "requests": requests,
+                "connections_opened": connections,
+                "connections_reused": max(requests - connections, 0),
+            }
+
+
+CLIENT_POOL = GroqClientPool()
+atexit.register(CLIENT_POOL.close)
+
+
+def client_lease(api_key: str, asynchronous: bool = False) -> _Lease:
+    return CLIENT_POOL.lease(api_key, asynchronous)
@@ -0,0 +1,284 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from instrumentation import METRICS, get_logger
+
+
+REQUESTS_PER_MINUTE = float(os.getenv("GROQ_RPM", "30"))
+TOKENS_PER_MINUTE = float(os.getenv("GROQ_TPM", "12000"))
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "20"))
+MAX_QUEUE_WAIT = float(os.getenv("GROQ_MAX_QUEUE_WAIT", "120"))
+POLL_INTERVAL = 0.25
+
+FOLLOW_UP = 0
+FRESH_TURN = 1
+PREFETCH = 2
+
+log = get_logger("scheduler")
+
+WAIT_SECONDS = METRICS.histogram("groq_queue_wait_seconds", "Час очікування в черзі планувальника")
+RETRIES = METRICS.counter("groq_retries_total", "Повторні спроби запитів до Groq")
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+def retryable_errors() -> tuple:
+    import groq
+
+    return groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError
+
+
+class _TokenBucket:
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate else POLL_INTERVAL
+
+
+class _Waiter:
+    __slots__ = ("session_id", "tokens", "enqueued", "granted", "event", "loop", "future")
+
+    def __init__(self, session_id: str, tokens: int):
+        self.session_id = session_id
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.event: Optional[threading.Event] = None
+        self.loop = None
+        self.future = None
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(True))
+
+
+class _KeyState:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = _TokenBucket(rpm)
+        self.tokens = _TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.lanes = (OrderedDict(), OrderedDict(), OrderedDict())
+
+    def depth(self) -> int:
+        return sum(len(q) for lane in self.lanes for q in lane.values())
+
+
+class Ticket:
+    __slots__ = ("api_key", "tokens")
+
+    def __init__(self, api_key: str, tokens: int):
+        self.api_key = api_key
+        self.tokens = tokens
+
+
+class RequestScheduler:
+    def __init__(self, rpm: float = REQUESTS_PER_MINUTE, tpm: float = TOKENS_PER_MINUTE):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._keys: Dict[str, _KeyState] = {}
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=2048)
+        self.retries = 0
+
+    def _state(self, api_key: str) -> _KeyState:
+        state = self._keys.get(api_key)
+        if state is None:
+            state = self._keys.setdefault(api_key, _KeyState(self.rpm, self.tpm))
+        return state
+
+    def _enqueue(self, api_key: str, waiter: _Waiter, priority: int):
+        with self._lock:
+            lane = self._state(api_key).lanes[priority]
+            lane.setdefault(waiter.session_id, deque()).append(waiter)
+            self._dispatch_locked(api_key)
+
+    def _next_waiter(self, state: _KeyState) -> Optional[_Waiter]:
+        for lane in state.lanes:
+            if lane:
+                return next(iter(lane.values()))[0]
+        return None
+
+    def _pop_waiter(self, state: _KeyState, waiter: _Waiter):
+        for lane in state.lanes:
+            queue = lane.get(waiter.session_id)
+            if queue and queue[0] is waiter:
+                queue.popleft()
+                del lane[waiter.session_id]
+                if queue:
+                    lane[waiter.session_id] = queue
+                return
+
+    def _dispatch_locked(self, api_key: str) -> float:
+        state = self._state(api_key)
+        now = time.monotonic()
+        if now < state.blocked_until:
+            return state.blocked_until - now
+
+        state.requests.refill(now)
+        state.tokens.refill(now)
+        while True:
+            waiter = self._next_waiter(state)
+            if waiter is None:
+                return POLL_INTERVAL
+            tokens = min(waiter.tokens, state.tokens.capacity)
+            if state.requests.level < 1 or state.tokens.level < tokens:
+                return max(state.requests.wait_for(1), state.tokens.wait_for(tokens), 0.01)
+            state.requests.level -= 1
+            state.tokens.level -= tokens
+            self._pop_waiter(state, waiter)
+            waiter.granted = True
+            wait = now - waiter.enqueued
+            self._waits.append(wait)
+            WAIT_SECONDS.observe(wait)
+            waiter.wake()
+
+    def _abandon(self, api_key: str, waiter: _Waiter):
+        with self._lock:
+            state = self._state(api_key)
+            for lane in state.lanes:
+                queue = lane.get(waiter.session_id)
+                if queue and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del lane[waiter.session_id]
+
+    def acquire_blocking(self, api_key: str, session_id: str, priority: int, tokens: int) -> Ticket:
+        waiter = _Waiter(session_id, tokens)
+        waiter.event = threading.Event()
+        self._enqueue(api_key, waiter, priority)
+        deadline = waiter.enqueued + MAX_QUEUE_WAIT
+        while not waiter.granted:
+            with self._lock:
+                if waiter.granted:
+                    break
+                delay = self._dispatch_locked(api_key)
+            if waiter.granted:
+                break
+            if time.monotonic() > deadline:
+                self._abandon(api_key, waiter)
+                raise QueueTimeout(f"Rate limit: очікування в черзі перевищило {MAX_QUEUE_WAIT:.0f} с")
+            waiter.event.wait(min(delay, POLL_INTERVAL))
+        return Ticket(api_key, tokens)
+
+    async def acquire(self, api_key: str, session_id: str, priority: int, tokens: int) -> Ticket:
+        waiter = _Waiter(session_id, tokens)
+        waiter.loop = asyncio.get_running_loop()
+        waiter.future = waiter.loop.create_future()
+        self._enqueue(api_key, waiter, priority)
+        deadline = waiter.enqueued + MAX_QUEUE_WAIT
+        try:
+            while not waiter.granted:
+                with self._lock:
+                    delay = 0.0 if waiter.granted else self._dispatch_locked(api_key)
+                if waiter.granted:
+                    break
+                if time.monotonic() > deadline:
+                    raise QueueTimeout(f"Rate limit: очікування в черзі перевищило {MAX_QUEUE_WAIT:.0f} с")
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), min(delay, POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if not waiter.granted:
+                self._abandon(api_key, waiter)
+            raise
+        return Ticket(api_key, tokens)
+
+    def settle(self, ticket: Ticket, usage: Optional[dict]):
+        if not usage:
+            return
+        used = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        with self._lock:
+            bucket = self._state(ticket.api_key).tokens
+            bucket.level = min(bucket.capacity, bucket.level + ticket.tokens - used)
+
+    def _retry_delay(self, api_key: str, error: Exception, attempt: int) -> float:
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after-ms")
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after) / 1000)
+            except ValueError:
+                pass
+        elif headers.get("retry-after"):
+            try:
+                delay = max(delay, float(headers["retry-after"]))
+            except ValueError:
+                pass
+
+        rate_limited, _, _ = retryable_errors()
+        if isinstance(error, rate_limited):
+            with self._lock:
+                state = self._state(api_key)
+                state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+        self.retries += 1
+        RETRIES.inc(error=type(error).__name__)
+        log.warning("Groq %s, повтор %d через %.2f с", type(error).__name__, attempt + 1, delay)
+        return delay
+
+    def run(self, api_key: str, session_id: str, priority: int, tokens: int, call: Callable[[], object]):
+        for attempt in range(MAX_RETRIES + 1):
+            ticket = self.acquire_blocking(api_key, session_id, priority, tokens)
+            try:
+                return ticket, call()
+            except retryable_errors() as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                time.sleep(self._retry_delay(api_key, e, attempt))
+
+    async def run_async(self, api_key: str, session_id: str, priority: int, tokens: int,
+                        call: Callable[[], Awaitable[object]]):
+        for attempt in range(MAX_RETRIES + 1):
+            ticket = await self.acquire(api_key, session_id, priority, tokens)
+            try:
+                return ticket, await call()
+            except retryable_errors() as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                await asyncio.sleep(self._retry_delay(api_key, e, attempt))
+
+    def stats(self) -> dict:
+        with self._lock:
+            depth = sum(state.depth() for state in self._keys.values())
+            waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p / 100 * len(waits)))]
+
+        return {
+            "queue_depth": depth,
+            "wait_p50_seconds": pct(50),
+            "wait_p95_seconds": pct(95),
+            "wait_p99_seconds": pct(99),
+            "retries": self.retries,
+        }
+
+
+SCHEDULER = RequestScheduler()
+METRICS.add_collector("groq_scheduler", SCHEDULER.stats)
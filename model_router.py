@@ -0,0 +1,65 @@
+import os
+from typing import Dict, Optional
+
+from instrumentation import METRICS, get_logger
+
+
+LARGE_MODEL = os.getenv("EXAM_MODEL_LARGE", "llama-3.3-70b-versatile")
+SMALL_MODEL = os.getenv("EXAM_MODEL_SMALL", "llama-3.1-8b-instant")
+ROUTING_ENABLED = os.getenv("EXAM_MODEL_ROUTING", "1") == "1"
+ROUTE_OVERRIDES = os.getenv("EXAM_MODEL_ROUTES", "")
+
+DEFAULT_ROUTES = {
+    "greeting": "small",
+    "start": "small",
+    "transition": "small",
+    "finish": "small",
+    "prefetch": "small",
+    "answer": "large",
+    "grading": "large",
+    "followup": "large",
+}
+
+log = get_logger("router")
+
+ROUTED = METRICS.counter("model_route_total", "Вибір моделі для кроку іспиту")
+MODEL_SECONDS = METRICS.histogram("groq_model_seconds", "Тривалість викликів Groq за моделлю")
+MODEL_TOKENS = METRICS.counter("groq_model_tokens_total", "Токени Groq за моделлю")
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    routes = {}
+    for item in spec.split(","):
+        step, _, tier = item.strip().partition("=")
+        if step and tier:
+            routes[step.strip()] = tier.strip()
+    return routes
+
+
+class ModelRouter:
+    def __init__(self, tiers: Dict[str, str], routes: Dict[str, str], enabled: bool = True):
+        self.tiers = tiers
+        self.routes = routes
+        self.enabled = enabled
+        unknown = {tier for tier in routes.values() if tier not in tiers}
+        if unknown:
+            raise ValueError(f"Невідомі рівні моделей у маршрутах: {', '.join(sorted(unknown))}")
+
+    def model_for(self, step: str) -> str:
+        tier = self.routes.get(step, "large") if self.enabled else "large"
+        model = self.tiers[tier]
+        ROUTED.inc(step=step, model=model)
+        return model
+
+    def observe(self, model: str, seconds: float, usage: Optional[dict]):
+        MODEL_SECONDS.observe(seconds, model=model)
+        if usage:
+            MODEL_TOKENS.inc(usage["prompt_tokens"], model=model, direction="prompt")
+            MODEL_TOKENS.inc(usage["completion_tokens"], model=model, direction="completion")
+
+
+MODEL_ROUTER = ModelRouter(
+    {"small": SMALL_MODEL, "large": LARGE_MODEL},
+    dict(DEFAULT_ROUTES, **parse_routes(ROUTE_OVERRIDES)),
+    ROUTING_ENABLED
+)
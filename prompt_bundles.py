@@ -0,0 +1,150 @@
+import copy
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from exam_context import estimate_tokens
+
+
+AWAITING_START = "awaiting_start"
+IN_TOPIC = "in_topic"
+ALL_TOPICS_DONE = "all_topics_done"
+
+PHASE_TOOLS = {
+    AWAITING_START: ("start_exam",),
+    IN_TOPIC: ("next_topic",),
+    ALL_TOPICS_DONE: ("end_exam",),
+}
+SERVER_PHASE_TOOLS = {
+    AWAITING_START: ("start_exam",),
+    IN_TOPIC: (),
+    ALL_TOPICS_DONE: ("end_exam",),
+}
+
+
+@dataclass(frozen=True)
+class PhaseBundle:
+    phase: str
+    tools: Tuple[dict, ...]
+    system_message: dict
+    prefix: bytes
+    prefix_hash: str
+    prefix_tokens: int
+    forced: Optional[str] = None
+
+    @property
+    def tool_choice(self):
+        if self.forced:
+            return {"type": "function", "function": {"name": self.forced}}
+        return "auto" if self.tools else "none"
+
+
+def _serialize(system_message: dict, tools: Sequence[dict]) -> bytes:
+    return json.dumps(
+        {"tools": list(tools), "messages": [system_message]},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def build_phase_bundles(system_prompt: str, tools: Sequence[dict], phase_tools: Dict[str, tuple] = PHASE_TOOLS,
+                        forced: Optional[Dict[str, str]] = None) -> Dict[str, PhaseBundle]:
+    by_name = {t["function"]["name"]: t for t in tools}
+    system_message = {"role": "system", "content": system_prompt}
+    bundles = {}
+    for phase, names in phase_tools.items():
+        bundle_tools = tuple(copy.deepcopy(by_name[n]) for n in names)
+        prefix = _serialize(system_message, bundle_tools)
+        bundles[phase] = PhaseBundle(
+            phase=phase,
+            tools=bundle_tools,
+            system_message=dict(system_message),
+            prefix=prefix,
+            prefix_hash=hashlib.sha256(prefix).hexdigest(),
+            prefix_tokens=estimate_tokens(prefix.decode("utf-8")),
+            forced=(forced or {}).get(phase)
+        )
+    return bundles
+
+
+def phase_of(progress: dict) -> str:
+    if not progress["active"]:
+        return AWAITING_START
+    if progress["all_topics_done"]:
+        return ALL_TOPICS_DONE
+    return IN_TOPIC
+
+
+@lru_cache(maxsize=1024)
+def progress_context(topic_number: int, total_topics: int, topic: str, questions: int) -> str:
+    if questions >= 3:
+        warning = f"УВАГА: Задав вже {questions} запитань на цій темі!"
+        instruction = " ЧАС ВИКЛИКАТИ next_topic!"
+    else:
+        warning = ""
+        instruction = "Продовжуй задавати запитання по цій темі"
+    return f"""
+ПОТОЧНИЙ СТАН ІСПИТУ:
+- Тема {topic_number}/{total_topics}: {topic}
+- Запитань на цій темі: {questions}
+
+{warning}
+{instruction}
+            """
+
+
+@lru_cache(maxsize=1024)
+def topic_state_context(topic_number: int, total_topics: int, topic: str, questions: int, budget: int) -> str:
+    remaining = max(budget - questions, 0)
+    if remaining <= 1:
+        instruction = "Це останнє запитання на цій темі. Тему перемкне система, next_topic не потрібен."
+    else:
+        instruction = "Продовжуй задавати запитання по цій темі"
+    return f"""
+ПОТОЧНИЙ СТАН ІСПИТУ:
+- Тема {topic_number}/{total_topics}: {topic}
+- Запитань на цій темі: {questions} з {budget}
+
+{instruction}
+            """
+
+
+GRADING_CONTEXT = "Усі теми пройдено. Оціни іспит за всією розмовою і виклич end_exam з оцінкою та відгуком."
+
+
+def transition_context(finished_topic: str, topic_number: int, total_topics: int, topic: str) -> str:
+    return (f"Тему «{finished_topic}» завершено. Коротко оціни останню відповідь студента "
+            f"і переходь до теми {topic_number}/{total_topics}: {topic}. Постав перше (базове) запитання з нової теми.")
+
+
+def _message_digest(message) -> Tuple[int, int]:
+    if isinstance(message, dict):
+        role, content = message.get("role"), message.get("content") or ""
+    else:
+        role, content = getattr(message, "role", None), getattr(message, "content", None) or ""
+    return hash((role, content)), estimate_tokens(content)
+
+
+class PrefixTracker:
+    __slots__ = ("bundle_hash", "messages")
+
+    def __init__(self):
+        self.bundle_hash: Optional[str] = None
+        self.messages: Tuple[Tuple[int, int], ...] = ()
+
+    def observe(self, bundle: PhaseBundle, messages: list) -> Tuple[int, int]:
+        current = tuple(_message_digest(m) for m in messages)
+        total = bundle.prefix_tokens + sum(tokens for _, tokens in current)
+
+        reused = 0
+        if bundle.prefix_hash == self.bundle_hash:
+            reused = bundle.prefix_tokens
+            for previous, message in zip(self.messages, current):
+                if previous[0] != message[0]:
+                    break
+                reused += message[1]
+
+        self.bundle_hash = bundle.prefix_hash
+        self.messages = current
+        return reused, total
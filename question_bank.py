@@ -0,0 +1,258 @@
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import random
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from instrumentation import METRICS, get_logger
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTION_BANK_PATH = os.getenv("EXAM_QUESTION_BANK", os.path.join(BASE_DIR, "data", "question_bank.json"))
+QUESTION_BANK_MODE = os.getenv("EXAM_QUESTION_BANK_MODE", "off")
+DUPLICATE_THRESHOLD = float(os.getenv("EXAM_QUESTION_DUPLICATE_THRESHOLD", "0.8"))
+
+DIMS = 1 << 14
+HEADER = struct.Struct("<4sIII32s")
+MAGIC = b"QBX1"
+LEVELS = ("base", "deeper")
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+log = get_logger("question_bank")
+
+BANK_QUESTIONS = METRICS.counter("question_bank_served_total", "Запитання, видані з банку замість генерації")
+
+
+def _features(text: str) -> Counter:
+    features = Counter()
+    for word in WORD_RE.findall(text.lower()):
+        features["w:" + word] += 1
+        padded = f"^{word}$"
+        for i in range(len(padded) - 2):
+            features["c:" + padded[i:i + 3]] += 1
+    return features
+
+
+def _hashed(text: str) -> Dict[int, float]:
+    vector: Dict[int, float] = {}
+    for feature, count in _features(text).items():
+        slot = zlib.crc32(feature.encode("utf-8")) % DIMS
+        vector[slot] = vector.get(slot, 0.0) + 1.0 + math.log(count)
+    return vector
+
+
+class QuestionIndex:
+    def __init__(self, idf, offsets, indices, values, fingerprint: bytes, handle=None):
+        self._idf = idf
+        self._offsets = offsets
+        self._indices = indices
+        self._values = values
+        self.fingerprint = fingerprint
+        self._handle = handle
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @classmethod
+    def build(cls, texts: List[str], fingerprint: bytes) -> "QuestionIndex":
+        raw = [_hashed(text) for text in texts]
+        df = Counter(slot for vector in raw for slot in vector)
+        idf = [0.0] * DIMS
+        for slot, n in df.items():
+            idf[slot] = math.log((1 + len(texts)) / (1 + n)) + 1.0
+
+        offsets, indices, values = [0], [], []
+        for vector in raw:
+            weighted = {slot: tf * idf[slot] for slot, tf in vector.items()}
+            norm = math.sqrt(sum(w * w for w in weighted.values())) or 1.0
+            for slot in sorted(weighted):
+                indices.append(slot)
+                values.append(weighted[slot] / norm)
+            offsets.append(len(indices))
+        return cls(idf, offsets, indices, values, fingerprint)
+
+    def save(self, path: str):
+        rows, nnz = len(self), len(self._indices)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, DIMS, rows, nnz, self.fingerprint))
+            f.write(struct.pack(f"<{DIMS}f", *self._idf))
+            f.write(struct.pack(f"<{rows + 1}I", *self._offsets))
+            f.write(struct.pack(f"<{nnz}I", *self._indices))
+            f.write(struct.pack(f"<{nnz}f", *self._values))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["QuestionIndex"]:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, dims, rows, nnz, fingerprint = HEADER.unpack_from(buffer)
+        if magic != MAGIC or dims != DIMS:
+            buffer.close()
+            return None
+
+        view = memoryview(buffer)
+        position = HEADER.size
+
+        def take(count: int, fmt: str):
+            nonlocal position
+            part = view[position:position + 4 * count].cast(fmt)
+            position += 4 * count
+            return part
+
+        idf = take(DIMS, "f")
+        offsets = take(rows + 1, "I")
+        indices = take(nnz, "I")
+        values = take(nnz, "f")
+        return cls(idf, offsets, indices, values, fingerprint, buffer)
+
+    def vector(self, text: str) -> Dict[int, float]:
+        weighted = {slot: tf * self._idf[slot] for slot, tf in _hashed(text).items() if self._idf[slot]}
+        norm = math.sqrt(sum(w * w for w in weighted.values())) or 1.0
+        return {slot: w / norm for slot, w in weighted.items()}
+
+    def row_vector(self, row: int) -> Dict[int, float]:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return {self._indices[i]: self._values[i] for i in range(start, end)}
+
+    def nearest(self, vector: Dict[int, float], limit: int = 5) -> List[Tuple[int, float]]:
+        scores = []
+        indices, values, offsets = self._indices, self._values, self._offsets
+        for row in range(len(self)):
+            score = 0.0
+            for i in range(offsets[row], offsets[row + 1]):
+                weight = vector.get(indices[i])
+                if weight:
+                    score += weight * values[i]
+            if score > 0:
+                scores.append((row, score))
+        scores.sort(key=lambda item: -item[1])
+        return scores[:limit]
+
+
+class QuestionBank:
+    def __init__(self, path: str = QUESTION_BANK_PATH):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".idx"
+        with open(path, encoding="utf-8") as f:
+            self.topics: Dict[str, Dict[str, List[str]]] = json.load(f)
+        self.rows: List[Tuple[str, str, str]] = [
+            (topic, level, text)
+            for topic, levels in self.topics.items()
+            for level in LEVELS
+            for text in levels.get(level, [])
+        ]
+        self.index = self._open_index()
+
+    def _fingerprint(self) -> bytes:
+        payload = json.dumps(self.rows, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(payload).digest()
+
+    def _open_index(self) -> QuestionIndex:
+        fingerprint = self._fingerprint()
+        if os.path.exists(self.index_path):
+            index = QuestionIndex.load(self.index_path)
+            if index is not None and index.fingerprint == fingerprint:
+                return index
+        index = QuestionIndex.build([text for _, _, text in self.rows], fingerprint)
+        try:
+            index.save(self.index_path)
+            reloaded = QuestionIndex.load(self.index_path)
+            if reloaded is not None:
+                index = reloaded
+        except OSError as e:
+            log.warning("Не вдалося записати індекс банку запитань %s: %s", self.index_path, e)
+        return index
+
+    def questions(self, topic: str, level: str = "base") -> List[str]:
+        return self.topics.get(topic, {}).get(level, [])
+
+    def pick(self, topic: str, seed: str, level: str = "base") -> Optional[str]:
+        options = self.questions(topic, level)
+        if not options:
+            return None
+        return random.Random(f"{seed}|{topic}|{level}").choice(options)
+
+    def similar(self, text: str, limit: int = 5) -> List[Tuple[float, str, str, str]]:
+        return [(score,) + self.rows[row] for row, score in self.index.nearest(self.index.vector(text), limit)]
+
+    def duplicates(self, text: str, threshold: float = DUPLICATE_THRESHOLD) -> List[Tuple[float, str, str, str]]:
+        return [match for match in self.similar(text) if match[0] >= threshold]
+
+    def duplicate_pairs(self, threshold: float = DUPLICATE_THRESHOLD) -> List[Tuple[float, str, str]]:
+        pairs = []
+        for row in range(len(self.rows)):
+            for other, score in self.index.nearest(self.index.row_vector(row), limit=3):
+                if other > row and score >= threshold:
+                    pairs.append((score, self.rows[row][2], self.rows[other][2]))
+        return pairs
+
+    def add(self, topic: str, level: str, text: str, threshold: float = DUPLICATE_THRESHOLD) -> List[tuple]:
+        duplicates = self.duplicates(text, threshold)
+        if duplicates:
+            return duplicates
+        self.topics.setdefault(topic, {}).setdefault(level, []).append(text)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.topics, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        self.rows.append((topic, level, text))
+        self.index = self._open_index()
+        return []
+
+
+def open_question_bank(mode: str = QUESTION_BANK_MODE, path: str = QUESTION_BANK_PATH) -> Optional[QuestionBank]:
+    if mode in ("off", "", "0"):
+        return None
+    if mode != "base":
+        raise ValueError(f"Невідомий режим банку запитань: {mode}")
+    bank = QuestionBank(path)
+    log.info("Банк запитань: %d тем, %d запитань", len(bank.topics), len(bank.rows))
+    return bank
+
+
+QUESTION_BANK = open_question_bank()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Банк базових і поглиблених запитань з індексом схожості")
+    parser.add_argument("--bank", default=QUESTION_BANK_PATH)
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="перебудувати індекс")
+    commands.add_parser("check", help="знайти майже однакові запитання в банку")
+    add = commands.add_parser("add", help="додати запитання, якщо в банку немає схожого")
+    add.add_argument("--topic", required=True)
+    add.add_argument("--level", choices=LEVELS, default="base")
+    add.add_argument("text")
+    similar = commands.add_parser("similar", help="найближчі запитання до тексту")
+    similar.add_argument("text")
+    args = parser.parse_args()
+
+    bank = QuestionBank(args.bank)
+    if args.command == "build":
+        print(f"Індекс {bank.index_path}: {len(bank.index)} запитань")
+    elif args.command == "check":
+        pairs = bank.duplicate_pairs(args.threshold)
+        for score, first, second in pairs:
+            print(f"{score:.2f}  {first}\n      {second}")
+        print(f"Майже однакових пар: {len(pairs)}")
+    elif args.command == "add":
+        duplicates = bank.add(args.topic, args.level, args.text, args.threshold)
+        for score, topic, level, text in duplicates:
+            print(f"Схоже ({score:.2f}, {topic}/{level}): {text}")
+        print("Не додано" if duplicates else "Додано")
+    elif args.command == "similar":
+        for score, topic, level, text in bank.similar(args.text):
+            print(f"{score:.2f}  [{topic}/{level}] {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+from completion_stream import reply_from_response
+from exam_context import estimate_messages_tokens
+from exam_storage import STORAGE_URL, open_storage
+from groq_pool import client_lease
+from groq_scheduler import FRESH_TURN, SCHEDULER
+from instrumentation import get_logger
+
+
+REGRADE_MODEL = os.getenv("EXAM_REGRADE_MODEL", "llama-3.3-70b-versatile")
+REGRADE_MAX_TOKENS = 400
+
+GRADING_INSTRUCTION = """Всі теми пройдено. Переоціни цей іспит за наведеною розмовою та критеріями оцінювання.
+Виклич end_exam з оцінкою від 0 до 10 і коротким відгуком для студента."""
+
+log = get_logger("regrade")
+
+
+def load_jobs(storage) -> Tuple[List[dict], int]:
+    results = {(r["email"], r["start_time"]): r for r in storage.load_results()}
+    jobs, orphaned = [], 0
+    for transcript in storage.load_transcripts():
+        result = results.get((transcript["email"], transcript["start_time"]))
+        if result is None:
+            orphaned += 1
+            continue
+        jobs.append({
+            "email": result["email"],
+            "name": result["name"],
+            "start_time": result["start_time"],
+            "old_score": result["score"],
+            "turns": transcript["turns"],
+        })
+    jobs.sort(key=lambda job: job["start_time"])
+    return jobs, orphaned
+
+
+def grading_messages(rubric: str, turns: List[List[str]]) -> list:
+    messages = [{"role": "system", "content": rubric}]
+    for user_msg, assistant_msg in turns:
+        messages.append({"role": "user", "content": user_msg})
+        if assistant_msg:
+            messages.append({"role": "assistant", "content": assistant_msg})
+    messages.append({"role": "system", "content": GRADING_INSTRUCTION})
+    return messages
+
+
+def job_key(rubric: str, model: str, turns: List[List[str]]) -> str:
+    payload = json.dumps({"rubric": rubric, "model": model, "turns": turns}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(path: str) -> Dict[str, dict]:
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[entry["key"]] = entry
+    return done
+
+
+def parse_grade(reply: dict) -> dict:
+    for call in reply["tool_calls"]:
+        if call["function"]["name"] == "end_exam":
+            arguments = json.loads(call["function"]["arguments"] or "{}")
+            return {"score": round(float(arguments["score"]), 1), "feedback": arguments.get("feedback", "")}
+    raise ValueError("Модель не викликала end_exam")
+
+
+async def grade(client, api_key: str, messages: list, tool: dict) -> dict:
+    params = {
+        "model": REGRADE_MODEL,
+        "messages": messages,
+        "tools": [tool],
+        "tool_choice": {"type": "function", "function": {"name": "end_exam"}},
+        "max_tokens": REGRADE_MAX_TOKENS,
+        "temperature": 0.0,
+    }
+    ticket, response = await SCHEDULER.run_async(
+        api_key, "regrade", FRESH_TURN, estimate_messages_tokens(messages) + REGRADE_MAX_TOKENS,
+        lambda: client.chat.completions.create(**params))
+    reply = reply_from_response(response)
+    SCHEDULER.settle(ticket, reply["usage"])
+    return parse_grade(reply)
+
+
+async def regrade(jobs: List[dict], rubric: str, tool: dict, api_key: str,
+                  checkpoint_path: str, concurrency: int) -> Tuple[Dict[str, dict], dict]:
+    done = load_checkpoint(checkpoint_path)
+    keys = {}
+    pending = []
+    for job in jobs:
+        key = job_key(rubric, REGRADE_MODEL, job["turns"])
+        job["key"] = key
+        if key not in done and key not in keys:
+            pending.append(job)
+        keys.setdefault(key, job)
+
+    counts = {
+        "exams": len(jobs),
+        "unique": len(keys),
+        "from_checkpoint": sum(1 for key in keys if key in done),
+        "graded": 0,
+        "failed": 0,
+    }
+    log.info("Переоцінювання: %d іспитів, %d унікальних, %d вже в чекпоінті",
+             counts["exams"], counts["unique"], counts["from_checkpoint"])
+
+    queue: "asyncio.Queue[dict]" = asyncio.Queue()
+    for job in pending:
+        queue.put_nowait(job)
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            client_lease(api_key, asynchronous=True) as client:
+        async def worker():
+            while not queue.empty():
+                job = queue.get_nowait()
+                try:
+                    grade_result = await grade(client, api_key, grading_messages(rubric, job["turns"]), tool)
+                except Exception as e:
+                    counts["failed"] += 1
+                    log.warning("Не вдалося переоцінити %s (%s): %s", job["email"], job["start_time"], e)
+                    continue
+                entry = dict(grade_result, key=job["key"])
+                done[job["key"]] = entry
+                checkpoint.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+                counts["graded"] += 1
+                if counts["graded"] % 100 == 0:
+                    log.info("Переоцінено %d/%d", counts["graded"], len(pending))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    return done, counts
+
+
+def write_report(path: str, jobs: List[dict], grades: Dict[str, dict]) -> dict:
+    summary = {"compared": 0, "changed": 0, "raised": 0, "lowered": 0, "delta_sum": 0.0, "abs_delta_sum": 0.0}
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["email", "name", "start_time", "old_score", "new_score", "delta", "feedback"])
+        for job in jobs:
+            new = grades.get(job["key"])
+            if new is None:
+                writer.writerow([job["email"], job["name"], job["start_time"], job["old_score"], "", "", ""])
+                continue
+            delta = round(new["score"] - job["old_score"], 1)
+            writer.writerow([job["email"], job["name"], job["start_time"], job["old_score"],
+                             new["score"], delta, new["feedback"]])
+            summary["compared"] += 1
+            summary["delta_sum"] += delta
+            summary["abs_delta_sum"] += abs(delta)
+            if delta:
+                summary["changed"] += 1
+                summary["raised" if delta > 0 else "lowered"] += 1
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетне переоцінювання завершених іспитів через Groq API")
+    parser.add_argument("--storage", default=STORAGE_URL)
+    parser.add_argument("--api-key", default=os.getenv("GROQ_API_KEY", ""))
+    parser.add_argument("--rubric", default="", help="файл з новим системним промптом (за замовчуванням промпт режиму EXAM_TOPIC_CONTROL)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--checkpoint", default="regrade_checkpoint.jsonl")
+    parser.add_argument("--report", default="regrade_report.csv")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("потрібен --api-key або змінна GROQ_API_KEY")
+
+    import app
+    if args.rubric:
+        with open(args.rubric, encoding="utf-8") as f:
+            rubric = f.read()
+    else:
+        rubric = app.SERVER_SYSTEM_PROMPT if app.TOPIC_CONTROL == "server" else app.SYSTEM_PROMPT
+    tool = next(t for t in app.TOOLS if t["function"]["name"] == "end_exam")
+
+    storage = open_storage(args.storage)
+    try:
+        jobs, orphaned = load_jobs(storage)
+    finally:
+        storage.close()
+    if orphaned:
+        log.warning("%d транскриптів без відповідного результату пропущено", orphaned)
+
+    started = time.perf_counter()
+    grades, counts = asyncio.run(regrade(jobs, rubric, tool, args.api_key, args.checkpoint, args.concurrency))
+    elapsed = time.perf_counter() - started
+    summary = write_report(args.report, jobs, grades)
+
+    compared = summary["compared"] or 1
+    print(f"Іспитів: {counts['exams']}, унікальних транскриптів: {counts['unique']}, "
+          f"з чекпоінту: {counts['from_checkpoint']}, переоцінено: {counts['graded']}, помилок: {counts['failed']}")
+    print(f"Порівняно: {summary['compared']}, змінено: {summary['changed']} "
+          f"(вище {summary['raised']}, нижче {summary['lowered']})")
+    print(f"Середня зміна: {summary['delta_sum'] / compared:+.2f}, середня абсолютна: {summary['abs_delta_sum'] / compared:.2f}")
+    print(f"Час: {elapsed:.1f} с, звіт: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+os.environ["EXAM_STORAGE"] = "none"
+os.environ["EXAM_STATE_BACKEND"] = "memory"
+os.environ["EXAM_RECORD_DIR"] = ""
+
+from exam_record import TOPIC_IDS  # noqa: E402
+from turn_recorder import expand_messages, read_turns  # noqa: E402
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _started_exams(turn: dict):
+    for tool in turn["tools"]:
+        result = tool["result"]
+        if tool["name"] == "start_exam" and result.get("success") and not result.get("resumed"):
+            yield json.loads(tool["arguments"] or "{}").get("email"), result["topics"]
+
+
+def _first_difference(sent: list, expected: list) -> int:
+    sent = json.loads(json.dumps(sent, ensure_ascii=False, default=str))
+    for index, (message, recorded) in enumerate(zip(sent, expected)):
+        if message != recorded:
+            return index
+    return -1 if len(sent) == len(expected) else min(len(sent), len(expected))
+
+
+def load_jobs(paths: List[str]) -> List[List[List[dict]]]:
+    sessions: Dict[str, List[dict]] = defaultdict(list)
+    for turn in read_turns(paths):
+        sessions[turn["session"]].append(turn)
+
+    chains: Dict[str, List[List[dict]]] = defaultdict(list)
+    for session_id, turns in sessions.items():
+        turns.sort(key=lambda t: (t["started"], t["index"]))
+        emails = [t["email"] for t in turns if t["email"]]
+        emails += [email for t in turns for email, _ in _started_exams(t)]
+        chains[emails[0] if emails else session_id].append(turns)
+    for chain in chains.values():
+        chain.sort(key=lambda turns: turns[0]["started"])
+    return list(chains.values())
+
+
+class Replayer:
+    def __init__(self, app):
+        self.app = app
+        self._pins: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        import exam_core
+
+        self._draw = exam_core.draw_topics
+        exam_core.draw_topics = self.draw_topics
+
+    def draw_topics(self, email: str) -> List[int]:
+        with self._lock:
+            pinned = self._pins.get(email)
+            if pinned:
+                return pinned.popleft()
+        return self._draw(email)
+
+    def run_chain(self, chain: List[List[dict]], run_id: str) -> dict:
+        stats = {"turns": 0, "completions": 0, "divergences": [], "answer_mismatches": 0, "overheads": []}
+        emails = set()
+        for turns in chain:
+            with self._lock:
+                for turn in turns:
+                    for email, topics in _started_exams(turn):
+                        self._pins[email].append([TOPIC_IDS[t] for t in topics])
+                        emails.add(email)
+            session_id = f"replay-{run_id}-{turns[0]['session']}"
+            session = self.app.SESSIONS.get(session_id)
+            sent = []
+            with session.lock:
+                for turn in turns:
+                    sent = self.replay_turn(session, turn, stats, sent)
+            self.app.SESSIONS.release(session_id)
+        for email in emails:
+            self.app.abandon_exam(email)
+            with self._lock:
+                self._pins.pop(email, None)
+        return stats
+
+    def replay_turn(self, session, turn: dict, stats: dict, sent: list) -> list:
+        app, recorded = self.app, turn["steps"]
+        where = f"{turn['session']}#{turn['index']}"
+        expected = list(expand_messages(recorded, sent))
+        position, overhead = 0, 0.0
+
+        turn_gen = app._chat_turn(turn["message"], session.transcript, session)
+        try:
+            started = time.perf_counter()
+            step = next(turn_gen)
+            overhead += time.perf_counter() - started
+            while True:
+                if "tool_calls" in step:
+                    started = time.perf_counter()
+                    step = turn_gen.send(app._execute_tool_calls(session, step["tool_calls"]))
+                    overhead += time.perf_counter() - started
+                    continue
+                if position < len(recorded):
+                    if step["step"] != recorded[position]["step"]:
+                        stats["divergences"].append(f"{where}: крок {step['step']} замість {recorded[position]['step']}")
+                    difference = _first_difference(step["params"]["messages"], expected[position])
+                    if difference >= 0:
+                        stats["divergences"].append(f"{where}: крок {step['step']}, повідомлення {difference} відрізняється")
+                    reply = copy.deepcopy(recorded[position]["reply"])
+                elif turn["error"]:
+                    turn_gen.close()
+                    app._turn_error(turn["message"], session.transcript, RuntimeError(turn["error"]))
+                    break
+                else:
+                    stats["divergences"].append(f"{where}: зайвий виклик LLM ({step['step']})")
+                    reply = {"content": turn["answer"], "tool_calls": [], "finish_reason": "stop", "usage": None}
+                position += 1
+                stats["completions"] += 1
+                started = time.perf_counter()
+                step = turn_gen.send(reply)
+                overhead += time.perf_counter() - started
+        except StopIteration:
+            overhead += time.perf_counter() - started
+            if position < len(recorded):
+                stats["divergences"].append(f"{where}: не використано {len(recorded) - position} відповідей LLM")
+            if not turn["error"] and session.transcript[-1][1] != turn["answer"]:
+                stats["answer_mismatches"] += 1
+        except Exception as e:
+            stats["divergences"].append(f"{where}: {e!r}")
+            app._turn_error(turn["message"], session.transcript, e)
+
+        stats["turns"] += 1
+        stats["overheads"].append(overhead)
+        return expected[-1] if expected else sent
+
+
+def replay(app, jobs: List[List[List[dict]]], concurrency: int, repeat: int) -> dict:
+    replayer = Replayer(app)
+    total = {"turns": 0, "completions": 0, "divergences": [], "answer_mismatches": 0, "overheads": []}
+    started = time.perf_counter()
+    for round_no in range(repeat):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            runs = [executor.submit(replayer.run_chain, chain, f"{round_no}-{i}") for i, chain in enumerate(jobs)]
+            for run in runs:
+                stats = run.result()
+                for key in ("turns", "completions", "answer_mismatches"):
+                    total[key] += stats[key]
+                total["divergences"].extend(stats["divergences"])
+                total["overheads"].extend(stats["overheads"])
+    elapsed = time.perf_counter() - started
+
+    overheads = total.pop("overheads")
+    return dict(
+        total,
+        exams=len(jobs) * repeat,
+        elapsed_s=round(elapsed, 3),
+        turns_per_s=round(total["turns"] / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(percentile(overheads, 50) * 1000, 3),
+        p95_ms=round(percentile(overheads, 95) * 1000, 3),
+        p99_ms=round(percentile(overheads, 99) * 1000, 3),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Відтворення записаних іспитів з відповідями LLM із журналу")
+    parser.add_argument("paths", nargs="+", help="файли turns-*.jsonl.gz або каталоги EXAM_RECORD_DIR")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", default="", help="зберегти підсумок у JSON для порівняння між версіями")
+    args = parser.parse_args()
+
+    import app
+
+    jobs = load_jobs(args.paths)
+    if not jobs:
+        parser.error("у журналі немає записаних ходів")
+    result = replay(app, jobs, args.concurrency, args.repeat)
+
+    print(f"Іспитів: {result['exams']}, ходів: {result['turns']}, відповідей LLM з журналу: {result['completions']}")
+    print(f"Накладні витрати на хід: p50 {result['p50_ms']} мс, p95 {result['p95_ms']} мс, p99 {result['p99_ms']} мс")
+    print(f"Час: {result['elapsed_s']} с, {result['turns_per_s']} ходів/с")
+    print(f"Розбіжностей: {len(result['divergences'])}, інших текстів відповіді: {result['answer_mismatches']}")
+    for divergence in result["divergences"][:20]:
+        print(f"  {divergence}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
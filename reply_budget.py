@@ -0,0 +1,112 @@
+import math
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict
+
+from exam_context import estimate_tokens
+from instrumentation import METRICS, get_logger
+from model_router import parse_routes
+
+
+MAX_TOKENS = int(os.getenv("EXAM_REPLY_MAX_TOKENS", "500"))
+MIN_TOKENS = int(os.getenv("EXAM_REPLY_MIN_TOKENS", "64"))
+BUDGET_OVERRIDES = os.getenv("EXAM_REPLY_BUDGETS", "")
+AUTOTUNE = os.getenv("EXAM_REPLY_AUTOTUNE", "1") == "1"
+TUNE_PERCENTILE = float(os.getenv("EXAM_REPLY_TUNE_PERCENTILE", "95"))
+TUNE_HEADROOM = float(os.getenv("EXAM_REPLY_TUNE_HEADROOM", "1.25"))
+TUNE_WINDOW = int(os.getenv("EXAM_REPLY_TUNE_WINDOW", "1000"))
+TUNE_MIN_SAMPLES = int(os.getenv("EXAM_REPLY_TUNE_MIN_SAMPLES", "200"))
+EARLY_STOP = os.getenv("EXAM_REPLY_EARLY_STOP", "1") == "1"
+
+DEFAULT_BUDGETS = {
+    "greeting": 200,
+    "start": 350,
+    "transition": 300,
+    "answer": 300,
+    "followup": 300,
+    "finish": 300,
+    "grading": 500,
+    "prefetch": 150,
+}
+QUESTION_STEPS = ("start", "transition", "answer")
+UNTUNED_STEPS = ("grading", "finish")
+
+log = get_logger("budget")
+
+REPLY_TOKENS = METRICS.histogram(
+    "exam_reply_tokens", "Довжина відповіді LLM у токенах за кроком", (25, 50, 100, 150, 200, 300, 400, 500, 800)
+)
+TRUNCATED = METRICS.counter("exam_reply_truncated_total", "Відповіді LLM, обрізані лімітом max_tokens")
+EARLY_STOPS = METRICS.counter("exam_reply_early_stop_total", "Відповіді LLM, зупинені після запитання")
+
+
+def _percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def reply_tokens(reply: dict) -> int:
+    if reply.get("usage"):
+        return reply["usage"]["completion_tokens"]
+    arguments = "".join(call["function"]["arguments"] for call in reply.get("tool_calls") or [])
+    return estimate_tokens(reply.get("content") or "") + estimate_tokens(arguments)
+
+
+class ReplyBudget:
+    def __init__(self, budgets: Dict[str, int], autotune: bool = AUTOTUNE, early_stop: bool = EARLY_STOP,
+                 window: int = TUNE_WINDOW, min_samples: int = TUNE_MIN_SAMPLES):
+        self.budgets = dict(budgets)
+        self.ceilings = {step: max(MAX_TOKENS, tokens) for step, tokens in budgets.items()}
+        self.autotune = autotune
+        self.early_stop = early_stop
+        self.window = window
+        self.min_samples = min_samples
+        self._lengths: Dict[str, Deque[int]] = {}
+        self._since_tune: Dict[str, int] = {}
+        self._truncated: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def max_tokens(self, step: str) -> int:
+        return self.budgets.get(step, MAX_TOKENS)
+
+    def stops_after_question(self, step: dict) -> bool:
+        return self.early_stop and step["step"] in QUESTION_STEPS and not step["params"].get("tools")
+
+    def observe(self, step: str, reply: dict):
+        tokens = reply_tokens(reply)
+        REPLY_TOKENS.observe(tokens, step=step)
+        if reply["finish_reason"] == "length":
+            TRUNCATED.inc(step=step)
+        elif reply["finish_reason"] == "question":
+            EARLY_STOPS.inc(step=step)
+        if not self.autotune or step in UNTUNED_STEPS:
+            return
+        with self._lock:
+            lengths = self._lengths.setdefault(step, deque(maxlen=self.window))
+            if reply["finish_reason"] == "length":
+                self._truncated[step] = self._truncated.get(step, 0) + 1
+            else:
+                lengths.append(tokens)
+            self._since_tune[step] = self._since_tune.get(step, 0) + 1
+            if len(lengths) < self.min_samples or self._since_tune[step] < self.min_samples:
+                return
+            self._since_tune[step] = 0
+            previous = self.budgets.get(step, MAX_TOKENS)
+            tuned = max(math.ceil(_percentile(lengths, TUNE_PERCENTILE) * TUNE_HEADROOM), max(lengths))
+            if self._truncated.pop(step, 0):
+                tuned = max(tuned, math.ceil(previous * TUNE_HEADROOM))
+            tuned = min(self.ceilings.get(step, MAX_TOKENS), max(MIN_TOKENS, tuned))
+            self.budgets[step] = tuned
+        if tuned != previous:
+            log.info("max_tokens для %s: %d -> %d (p%g за %d відповідей)", step, previous, tuned,
+                     TUNE_PERCENTILE, len(lengths))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.budgets)
+
+
+REPLY_BUDGET = ReplyBudget(
+    dict(DEFAULT_BUDGETS, **{step: int(tokens) for step, tokens in parse_routes(BUDGET_OVERRIDES).items()})
+)
@@ -0,0 +1,229 @@
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+import secrets
+import sys
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from exam_stats import SCORE_BANDS
+from exam_storage import STORAGE_URL, open_storage
+from instrumentation import METRICS
+
+
+ADMIN_TOKEN = os.getenv("EXAM_ADMIN_TOKEN", "")
+PAGE_LIMIT = int(os.getenv("EXAM_EXPORT_PAGE_LIMIT", "500"))
+ROW_GROUP = int(os.getenv("EXAM_EXPORT_ROW_GROUP", "1000"))
+CURSOR_PREFIX = "r1:"
+
+COLUMNS = (
+    "email", "name", "score", "start_time", "end_time", "duration_minutes", "topics", "answers_count", "feedback",
+)
+
+EXPORTED = METRICS.counter("exam_results_exported_total", "Результати іспитів, віддані через адмін-експорт")
+
+
+def _band_range(name: str) -> Tuple[float, Optional[float]]:
+    for i, (band, low) in enumerate(SCORE_BANDS):
+        if band == name:
+            return low, (SCORE_BANDS[i - 1][1] - 0.01 if i else None)
+    raise ValueError(f"Невідомий діапазон оцінок: {name}. Доступні: {', '.join(b for b, _ in SCORE_BANDS)}")
+
+
+@dataclass(frozen=True)
+class ResultFilter:
+    since: Optional[str] = None
+    until: Optional[str] = None
+    topic: Optional[str] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+
+    @classmethod
+    def from_params(cls, params) -> "ResultFilter":
+        min_score, max_score = params.get("min_score"), params.get("max_score")
+        try:
+            min_score = float(min_score) if min_score not in (None, "") else None
+            max_score = float(max_score) if max_score not in (None, "") else None
+        except ValueError:
+            raise ValueError("min_score і max_score мають бути числами") from None
+        if params.get("band"):
+            low, high = _band_range(params["band"])
+            min_score = low if min_score is None else max(min_score, low)
+            if high is not None:
+                max_score = high if max_score is None else min(max_score, high)
+        return cls(params.get("since") or None, params.get("until") or None, params.get("topic") or None,
+                   min_score, max_score)
+
+
+def encode_cursor(result_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{CURSOR_PREFIX}{result_id}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        if raw.startswith(CURSOR_PREFIX):
+            return int(raw[len(CURSOR_PREFIX):])
+    except (ValueError, UnicodeDecodeError):
+        pass
+    raise ValueError("Невірний курсор")
+
+
+def check_admin_token(authorization: str, token: str = ADMIN_TOKEN) -> bool:
+    scheme, _, value = (authorization or "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and secrets.compare_digest(value.strip(), token)
+
+
+def results_page(storage, filters: ResultFilter, cursor: Optional[str] = None,
+                 limit: int = PAGE_LIMIT) -> Tuple[List[dict], Optional[str]]:
+    rows, last_id = [], None
+    results = storage.iter_results(decode_cursor(cursor), **asdict(filters))
+    try:
+        for result_id, result in results:
+            if len(rows) == limit:
+                break
+            rows.append(result)
+            last_id = result_id
+        else:
+            last_id = None
+    finally:
+        results.close()
+    EXPORTED.inc(len(rows), format="page")
+    return rows, encode_cursor(last_id) if last_id is not None else None
+
+
+def _row(result: dict) -> dict:
+    row = {column: result.get(column) for column in COLUMNS}
+    row["topics"] = "; ".join(result.get("topics") or ())
+    return row
+
+
+def write_csv(results: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for i, result in enumerate(results, 1):
+        writer.writerow(_row(result))
+        if i % 100 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_jsonl(results: Iterable[dict]) -> Iterator[str]:
+    for result in results:
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+
+
+def _row_groups(results: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    group = []
+    for result in results:
+        group.append(_row(result))
+        if len(group) == size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def write_columnar(results: Iterable[dict], row_group: int = ROW_GROUP) -> Iterator[str]:
+    yield json.dumps({"columns": list(COLUMNS), "row_group": row_group}, ensure_ascii=False) + "\n"
+    for group in _row_groups(results, row_group):
+        columns = {column: [row[column] for row in group] for column in COLUMNS}
+        yield json.dumps({"rows": len(group), "columns": columns}, ensure_ascii=False) + "\n"
+
+
+def write_parquet(results: Iterable[dict], row_group: int = ROW_GROUP) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для формату parquet потрібен пакет pyarrow") from None
+
+    schema = pa.schema([
+        ("email", pa.string()), ("name", pa.string()), ("score", pa.float64()), ("start_time", pa.string()),
+        ("end_time", pa.string()), ("duration_minutes", pa.float64()), ("topics", pa.string()),
+        ("answers_count", pa.int64()), ("feedback", pa.string()),
+    ])
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for group in _row_groups(results, row_group):
+            writer.write_table(pa.Table.from_pylist(group, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+FORMATS: Dict[str, Tuple[str, str, Callable[[Iterable[dict]], Iterator]]] = {
+    "csv": ("text/csv; charset=utf-8", "csv", write_csv),
+    "jsonl": ("application/x-ndjson", "jsonl", write_jsonl),
+    "columnar": ("application/x-ndjson", "columns.jsonl", write_columnar),
+    "parquet": ("application/vnd.apache.parquet", "parquet", write_parquet),
+}
+
+
+def export_stream(storage, filters: ResultFilter, fmt: str) -> Tuple[str, str, Iterator]:
+    if fmt not in FORMATS:
+        raise ValueError(f"Невідомий формат: {fmt}. Доступні: {', '.join(FORMATS)}")
+    media_type, extension, write = FORMATS[fmt]
+
+    def results():
+        for _, result in storage.iter_results(0, **asdict(filters)):
+            EXPORTED.inc(format=fmt)
+            yield result
+
+    chunks = write(results())
+    first = next(chunks, None)
+
+    def body():
+        if first is not None:
+            yield first
+        yield from chunks
+
+    return media_type, extension, body()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковий експорт результатів іспитів з фільтрами")
+    parser.add_argument("--storage", default=STORAGE_URL)
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--since", help="end_time від (ISO, включно)")
+    parser.add_argument("--until", help="end_time до (ISO, не включно)")
+    parser.add_argument("--topic")
+    parser.add_argument("--min-score", dest="min_score")
+    parser.add_argument("--max-score", dest="max_score")
+    parser.add_argument("--band", help=", ".join(b for b, _ in SCORE_BANDS))
+    parser.add_argument("--output", default="-")
+    args = parser.parse_args()
+
+    storage = open_storage(args.storage)
+    try:
+        filters = ResultFilter.from_params(vars(args))
+        _, _, body = export_stream(storage, filters, args.format)
+        binary = args.format == "parquet"
+        if args.output == "-":
+            out = sys.stdout.buffer if binary else sys.stdout
+        else:
+            out = open(args.output, "wb") if binary else open(args.output, "w", encoding="utf-8", newline="")
+        try:
+            for chunk in body:
+                out.write(chunk)
+        finally:
+            if args.output != "-":
+                out.close()
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import atexit
+import copy
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from instrumentation import METRICS, get_logger
+
+
+STATE_BACKEND_URL = os.getenv("EXAM_STATE_BACKEND", "memory")
+STATE_PREFIX = os.getenv("EXAM_STATE_PREFIX", "examiner:")
+MAX_CAS_RETRIES = int(os.getenv("EXAM_STATE_CAS_RETRIES", "64"))
+
+log = get_logger("state")
+
+CONFLICTS = METRICS.counter("exam_state_conflicts_total", "Конфлікти оптимістичних оновлень спільного стану")
+
+Mutator = Callable[[Any], Any]
+Codec = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+
+
+class ConflictError(Exception):
+    pass
+
+
+class MemoryMap:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._data[key] = value
+
+    def put_if_absent(self, key: str, value) -> bool:
+        with self._lock:
+            if key in self._data:
+                return False
+            self._data[key] = value
+            return True
+
+    def update(self, key: str, mutate: Mutator) -> Tuple[Optional[Any], Any]:
+        with self._lock:
+            current = self._data.get(key)
+            if current is None:
+                return None, None
+            value = copy.deepcopy(current)
+            result = mutate(value)
+            self._data[key] = value
+            return value, result
+
+    def pop(self, key: str):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def pop_if(self, key: str, expected) -> bool:
+        with self._lock:
+            if self._data.get(key) != expected:
+                return False
+            del self._data[key]
+            return True
+
+
+class RedisMap:
+    def __init__(self, client, namespace: str, prefix: str = STATE_PREFIX, ttl: Optional[int] = None,
+                 indexed: bool = True, codec: Optional[Codec] = None):
+        self.namespace = namespace
+        self._client = client
+        self._dump, self._load = codec or (None, None)
+        self._prefix = f"{prefix}{namespace}:"
+        self._index = f"{prefix}{namespace}" if indexed else None
+        self._ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def _decode(self, raw):
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        return self._load(value) if self._load else value
+
+    def _encode(self, value) -> str:
+        return json.dumps(self._dump(value) if self._dump else value, ensure_ascii=False)
+
+    def _stage_write(self, pipe, key: str, value, nx: bool = False):
+        pipe.set(self._key(key), self._encode(value), ex=self._ttl, nx=nx)
+        if self._index:
+            pipe.sadd(self._index, key)
+
+    def _stage_delete(self, pipe, key: str):
+        pipe.delete(self._key(key))
+        if self._index:
+            pipe.srem(self._index, key)
+
+    def get(self, key: str, default=None):
+        if key is None:
+            return default
+        value = self._decode(self._client.get(self._key(key)))
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return key is not None and bool(self._client.exists(self._key(key)))
+
+    def __len__(self) -> int:
+        if not self._index:
+            raise TypeError(f"{self.namespace}: розмір доступний лише для індексованих просторів")
+        return self._client.scard(self._index)
+
+    def keys(self) -> Iterator[str]:
+        if not self._index:
+            raise TypeError(f"{self.namespace}: перелік ключів доступний лише для індексованих просторів")
+        return iter(sorted(k.decode("utf-8") if isinstance(k, bytes) else k
+                           for k in self._client.smembers(self._index)))
+
+    def put(self, key: str, value):
+        with self._client.pipeline(transaction=True) as pipe:
+            self._stage_write(pipe, key, value)
+            pipe.execute()
+
+    def put_if_absent(self, key: str, value) -> bool:
+        with self._client.pipeline(transaction=True) as pipe:
+            self._stage_write(pipe, key, value, nx=True)
+            return bool(pipe.execute()[0])
+
+    def _transaction(self, key: str, apply: Callable[[Any, Any], Any]):
+        import redis
+
+        name = self._key(key)
+        with self._client.pipeline(transaction=True) as pipe:
+            for _ in range(MAX_CAS_RETRIES):
+                try:
+                    pipe.watch(name)
+                    current = self._decode(pipe.get(name))
+                    pipe.multi()
+                    outcome = apply(pipe, current)
+                    pipe.execute()
+                    return outcome
+                except redis.WatchError:
+                    CONFLICTS.inc(namespace=self.namespace)
+                    continue
+        raise ConflictError(f"{self.namespace}:{key}: забагато конкурентних оновлень")
+
+    def update(self, key: str, mutate: Mutator) -> Tuple[Optional[Any], Any]:
+        def apply(pipe, current):
+            if current is None:
+                return None, None
+            result = mutate(current)
+            self._stage_write(pipe, key, current)
+            return current, result
+
+        return self._transaction(key, apply)
+
+    def pop(self, key: str):
+        def apply(pipe, current):
+            if current is not None:
+                self._stage_delete(pipe, key)
+            return current
+
+        return self._transaction(key, apply)
+
+    def pop_if(self, key: str, expected) -> bool:
+        def apply(pipe, current):
+            if current is None or current != expected:
+                return False
+            self._stage_delete(pipe, key)
+            return True
+
+        return self._transaction(key, apply)
+
+
+class StateBackend:
+    def __init__(self, url: str = STATE_BACKEND_URL):
+        self.url = url
+        self._client = None
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("Для EXAM_STATE_BACKEND=redis://... потрібен пакет redis") from None
+            self._client = redis.Redis.from_url(url)
+            log.info("Спільний стан іспитів: %s", url)
+        elif url not in ("memory", ""):
+            raise ValueError(f"Невідомий бекенд стану: {url}")
+
+    @property
+    def remote(self) -> bool:
+        return self._client is not None
+
+    def map(self, namespace: str, ttl: Optional[int] = None, indexed: bool = True, codec: Optional[Codec] = None):
+        if self._client is None:
+            return MemoryMap(namespace)
+        return RedisMap(self._client, namespace, ttl=ttl, indexed=indexed, codec=codec)
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+
+
+STATE = StateBackend()
+atexit.register(STATE.close)
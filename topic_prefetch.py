@@ -0,0 +1,107 @@
+import atexit
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from instrumentation import METRICS, get_logger
+
+
+PREFETCH_ENABLED = os.getenv("EXAM_TOPIC_PREFETCH", "0") == "1"
+PREFETCH_AFTER = int(os.getenv("EXAM_TOPIC_PREFETCH_AFTER", "2"))
+PREFETCH_WORKERS = int(os.getenv("EXAM_TOPIC_PREFETCH_WORKERS", "8"))
+
+OUTCOMES = ("scheduled", "served", "not_ready", "failed", "cancelled", "wasted")
+
+log = get_logger("prefetch")
+
+PREFETCHES = METRICS.counter("topic_prefetch_total", "Попередня генерація першого запитання наступної теми")
+
+
+class TopicPrefetcher:
+    def __init__(self, enabled: bool = PREFETCH_ENABLED, workers: int = PREFETCH_WORKERS):
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if enabled:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic-prefetch")
+        self._entries: Dict[str, Tuple[str, int, Future]] = {}
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+        PREFETCHES.inc(outcome=outcome)
+
+    def _finished(self, future: Future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._count("failed")
+            log.warning("Не вдалося підготувати запитання наступної теми: %s", error)
+
+    def _retire(self, future: Future):
+        if future.cancel():
+            self._count("cancelled")
+            return
+        future.add_done_callback(lambda f: f.cancelled() or f.exception() or self._count("wasted"))
+
+    def schedule(self, email: str, start_time: str, topic_index: int, generate: Callable[[], str]):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[:2] == (start_time, topic_index):
+                return
+            future = self._executor.submit(generate)
+            self._entries[email] = (start_time, topic_index, future)
+        if entry is not None:
+            self._retire(entry[2])
+        future.add_done_callback(self._finished)
+        self._count("scheduled")
+
+    def take(self, email: str, start_time: str, topic_index: int) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.pop(email, None)
+        if entry is None:
+            return None
+
+        started, index, future = entry
+        if (started, index) != (start_time, topic_index):
+            self._retire(future)
+            return None
+        if not future.done():
+            self._count("not_ready")
+            self._retire(future)
+            return None
+        if future.cancelled() or future.exception() is not None:
+            return None
+
+        question = (future.result() or "").strip()
+        if not question:
+            return None
+        self._count("served")
+        return question
+
+    def discard(self, email: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.pop(email, None)
+        if entry is not None:
+            self._retire(entry[2])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts, pending=len(self._entries))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+PREFETCHER = TopicPrefetcher()
+atexit.register(PREFETCHER.close)
@@ -0,0 +1,135 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from instrumentation import METRICS, get_logger
+
+
+RECORD_DIR = os.getenv("EXAM_RECORD_DIR", "")
+
+log = get_logger("recorder")
+
+RECORDED = METRICS.counter("exam_turns_recorded_total", "Ходи, записані для відтворення")
+
+
+def _message_key(message: dict) -> int:
+    return hash(json.dumps(message, ensure_ascii=False, sort_keys=True, default=str))
+
+
+class TurnRecorder:
+    def __init__(self, directory: str = RECORD_DIR):
+        self.enabled = bool(directory)
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, f"turns-{os.getpid()}.jsonl.gz")
+            log.info("Запис ходів у %s", self.path)
+
+    def begin(self, session, message: str):
+        if not self.enabled:
+            return
+        previous = session.recording["sent"] if session.recording else []
+        session.recording = {
+            "sent": previous,
+            "turn": {
+                "session": session.session_id,
+                "email": session.email,
+                "index": len(session.transcript),
+                "message": message,
+                "started": time.time(),
+                "steps": [],
+                "tools": [],
+            }
+        }
+
+    def step(self, session, step: dict, reply: dict, cached: bool, seconds: float):
+        if not self.enabled or not session.recording:
+            return
+        params = step["params"]
+        keys = [_message_key(m) for m in params["messages"]]
+        sent = session.recording["sent"]
+        reused = 0
+        while reused < min(len(keys), len(sent)) and keys[reused] == sent[reused]:
+            reused += 1
+        session.recording["sent"] = keys
+        session.recording["turn"]["steps"].append({
+            "step": step["step"],
+            "model": params["model"],
+            "max_tokens": params["max_tokens"],
+            "tools": [t["function"]["name"] for t in params.get("tools") or []],
+            "messages": {"reuse": reused, "append": params["messages"][reused:]},
+            "reply": reply,
+            "cached": cached,
+            "seconds": round(seconds, 4),
+        })
+
+    def tools(self, session, tool_calls: list, outcomes: list, seconds: float):
+        if not self.enabled or not session.recording:
+            return
+        for tool_call, (function_name, result, _) in zip(tool_calls, outcomes):
+            session.recording["turn"]["tools"].append({
+                "id": tool_call["id"],
+                "name": function_name,
+                "arguments": tool_call["function"]["arguments"],
+                "result": result,
+            })
+        session.recording["turn"]["tools_seconds"] = round(
+            session.recording["turn"].get("tools_seconds", 0.0) + seconds, 4
+        )
+
+    def end(self, session, answer: Optional[str] = None, error: Optional[str] = None):
+        if not self.enabled or not session.recording:
+            return
+        turn = session.recording.pop("turn", None)
+        if turn is None:
+            return
+        turn["answer"] = answer
+        turn["error"] = error
+        turn["seconds"] = round(time.time() - turn["started"], 4)
+        line = json.dumps(turn, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = gzip.open(self.path, "at", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+        except OSError as e:
+            log.warning("Не вдалося записати хід у %s: %s", self.path, e)
+            return
+        RECORDED.inc(outcome="error" if error else "ok")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_turns(paths: List[str]) -> Iterator[dict]:
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl*"))) if os.path.isdir(path) else [path])
+    for path in files:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def expand_messages(steps: List[dict], sent: Optional[list] = None) -> Iterator[list]:
+    sent = list(sent or [])
+    for step in steps:
+        sent = sent[:step["messages"]["reuse"]] + step["messages"]["append"]
+        yield sent
+
+
+RECORDER = TurnRecorder()
+atexit.register(RECORDER.close)